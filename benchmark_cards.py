@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Achievement Card Benchmark
+
+Measures how many achievement cards per second the bot can render, comparing
+the original per-card renderer with the prebuilt CardTemplate, and how long
+each CARD_FORMAT takes to encode and how large the result is.
+
+Usage:
+    python benchmark_cards.py [--cards 50] [--max-bytes 950000] [--quality 85]
+"""
+
+import argparse
+import time
+from PIL import Image, ImageDraw, ImageChops
+
+from bot import CARD_FORMATS, CardTemplate, encode_card
+
+SAMPLES = [
+    ('Power Poster II', 'Alice Smith', 'Mythic'),
+    ('Night Owl', 'bob.bsky.social', 'Diamond'),
+    ('Conversation Starter', 'Carol', 'Gold'),
+]
+
+
+def sample_avatar() -> Image.Image:
+    avatar = Image.new('RGBA', (200, 200), (90, 140, 200, 255))
+    ImageDraw.Draw(avatar).ellipse([50, 50, 150, 150], fill=(250, 220, 120, 255))
+    return avatar
+
+
+def legacy_render(template: CardTemplate, achievement_name: str, user_name: str, rarity_tier: str, avatar: Image.Image) -> Image.Image:
+    """The original renderer: every layer redrawn and every font reloaded per card"""
+    width, height = 1200, 630
+    img = Image.new('RGB', (width, height))
+    draw = ImageDraw.Draw(img)
+    for y in range(height):
+        ratio = y / height
+        r = int(43 + (88 - 43) * ratio)
+        g = int(45 + (101 - 45) * ratio)
+        b = int(49 + (242 - 49) * ratio)
+        draw.line([(0, y), (width, y)], fill=(r, g, b))
+
+    avatar_size = 200
+    mask = Image.new('L', (avatar_size, avatar_size), 0)
+    ImageDraw.Draw(mask).ellipse([0, 0, avatar_size, avatar_size], fill=255)
+    circular_avatar = Image.new('RGBA', (avatar_size, avatar_size), (0, 0, 0, 0))
+    circular_avatar.paste(avatar, (0, 0))
+    circular_avatar.putalpha(mask)
+    border_size = 8
+    border_avatar = Image.new('RGBA', (avatar_size + border_size * 2, avatar_size + border_size * 2), (255, 255, 255, 255))
+    border_mask = Image.new('L', (avatar_size + border_size * 2, avatar_size + border_size * 2), 0)
+    ImageDraw.Draw(border_mask).ellipse([0, 0, avatar_size + border_size * 2, avatar_size + border_size * 2], fill=255)
+    border_avatar.putalpha(border_mask)
+    img.paste(border_avatar, (width // 2 - (avatar_size + border_size * 2) // 2, height // 2 - (avatar_size + border_size * 2) // 2), border_avatar)
+    img.paste(circular_avatar, (width // 2 - avatar_size // 2, height // 2 - avatar_size // 2), circular_avatar)
+
+    for text, size, y, fill in (
+        (achievement_name, 48, 50, (255, 255, 255)),
+        (user_name, 32, height // 2 + 150, (220, 221, 222)),
+        ("feedmaster", 28, height - 80, (180, 180, 180)),
+    ):
+        font = template._load_font(size)
+        bbox = draw.textbbox((0, 0), text, font=font)
+        draw.text((width // 2 - (bbox[2] - bbox[0]) // 2, y), text, fill=fill, font=font)
+
+    rarity_font = template._load_font(18)
+    rarity_text = f"{rarity_tier} Achievement"
+    rarity_bbox = draw.textbbox((0, 0), rarity_text, font=rarity_font)
+    rarity_width = rarity_bbox[2] - rarity_bbox[0]
+    rarity_height = rarity_bbox[3] - rarity_bbox[1]
+    badge_padding = 12
+    badge_x = width // 2 - rarity_width // 2 - badge_padding
+    badge_y = 120
+    draw.rounded_rectangle([badge_x, badge_y, badge_x + rarity_width + (badge_padding * 2), badge_y + rarity_height + (badge_padding * 2)],
+                           radius=12, fill=CardTemplate.RARITY_COLORS[rarity_tier])
+    draw.text((width // 2 - rarity_width // 2, badge_y + badge_padding), rarity_text, fill=(0, 0, 0), font=rarity_font)
+    return img
+
+
+def cards_per_second(render, cards: int) -> float:
+    start = time.perf_counter()
+    for i in range(cards):
+        render(*SAMPLES[i % len(SAMPLES)])
+    return cards / (time.perf_counter() - start)
+
+
+def encode_stats(card_format: str, images: list, max_bytes: int, quality: int) -> tuple:
+    start = time.perf_counter()
+    sizes = [len(encode_card(img, card_format, max_bytes, quality)) for img in images]
+    return (time.perf_counter() - start) * 1000 / len(images), sum(sizes) // len(sizes), max(sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cards', type=int, default=50, help='cards rendered per measurement')
+    parser.add_argument('--max-bytes', type=int, default=950000, help='CARD_MAX_BYTES budget for the encoders')
+    parser.add_argument('--quality', type=int, default=85, help='CARD_QUALITY for jpeg and webp')
+    args = parser.parse_args()
+
+    avatar = sample_avatar()
+    start = time.perf_counter()
+    template = CardTemplate()
+    setup_ms = (time.perf_counter() - start) * 1000
+
+    for sample in SAMPLES:
+        difference = ImageChops.difference(legacy_render(template, *sample, avatar), template.render(*sample, avatar))
+        print(f"{sample[0]!r}: {'identical' if difference.getbbox() is None else 'DIFFERENT'} output")
+
+    before = cards_per_second(lambda *sample: legacy_render(template, *sample, avatar), args.cards)
+    after = cards_per_second(lambda *sample: template.render(*sample, avatar), args.cards)
+    print(f"Template setup: {setup_ms:.1f} ms (once at startup)")
+    print(f"Before (legacy renderer): {before:8.1f} cards/s")
+    print(f"After (CardTemplate):     {after:8.1f} cards/s ({after / before:.1f}x)")
+
+    # Photo-like avatars are what make real cards expensive to compress
+    photo = Image.effect_noise((200, 200), 60).convert('RGBA')
+    images = [template.render(*SAMPLES[i % len(SAMPLES)], photo) for i in range(min(args.cards, 20))]
+    print(f"Encoding (budget {args.max_bytes} bytes, quality {args.quality}):")
+    for card_format in CARD_FORMATS:
+        encode_ms, average_bytes, largest = encode_stats(card_format, images, args.max_bytes, args.quality)
+        print(f"  {card_format:5} {encode_ms:7.1f} ms/card {average_bytes:9d} bytes avg {largest:9d} max")
+
+
+if __name__ == '__main__':
+    main()
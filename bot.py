@@ -6,20 +6,43 @@ Polls Feedmaster API for new achievements and posts them to Bluesky.
 """
 
 import asyncio
+import bisect
 import os
 import json
 import logging
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
 import httpx
-from atproto import Client, models
-from atproto.exceptions import AtProtocolError
-from bs4 import BeautifulSoup
+from atproto import AsyncClient, Session, models
+from atproto.exceptions import BadRequestError, LoginRequiredError, RequestErrorBase, UnauthorizedError
 from dotenv import load_dotenv
 import re
+import codecs
 import hashlib
+import inspect
+import tempfile
+import math
+import mmap
+import multiprocessing
+import sqlite3
+import struct
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import heapq
+import random
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from html.parser import HTMLParser
 from io import BytesIO
 from PIL import Image, ImageDraw, ImageFont
+from urllib.parse import quote, urljoin, urlparse, urlunparse
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 # Load environment variables
 load_dotenv()
@@ -31,6 +54,1984 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class MetricsRegistry:
+    """In-process counters, gauges and histograms, rendered in the Prometheus text format"""
+    
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+    
+    def __init__(self):
+        # name -> (type, help, buckets), in registration order
+        self._metrics: Dict[str, tuple] = {}
+        # name -> label tuple -> value, or [per-bucket counts, sum, count] for histograms
+        self._series: Dict[str, Dict[tuple, object]] = {}
+        self._collectors = []
+    
+    def counter(self, name: str, help_text: str):
+        self._register(name, 'counter', help_text)
+    
+    def gauge(self, name: str, help_text: str):
+        self._register(name, 'gauge', help_text)
+    
+    def histogram(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS):
+        self._register(name, 'histogram', help_text, tuple(sorted(buckets)))
+    
+    def _register(self, name: str, kind: str, help_text: str, buckets: tuple = ()):
+        self._metrics[name] = (kind, help_text, buckets)
+        self._series.setdefault(name, {})
+    
+    @staticmethod
+    def _labels(labels: Dict) -> tuple:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+    
+    def inc(self, name: str, value: float = 1.0, **labels):
+        series = self._series[name]
+        key = self._labels(labels)
+        series[key] = series.get(key, 0.0) + value
+    
+    def set(self, name: str, value: float, **labels):
+        self._series[name][self._labels(labels)] = value
+    
+    def observe(self, name: str, value: float, **labels):
+        buckets = self._metrics[name][2]
+        series = self._series[name]
+        key = self._labels(labels)
+        entry = series.get(key)
+        if entry is None:
+            # One count per bucket plus +Inf, made cumulative when rendered
+            entry = series[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+        entry[0][bisect.bisect_left(buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+    
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Observe the seconds spent in the block"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - start, **labels)
+    
+    def add_collector(self, collect):
+        """Register a callback that refreshes gauges right before each scrape"""
+        self._collectors.append(collect)
+    
+    @staticmethod
+    def _number(value: float) -> str:
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        if float(value).is_integer():
+            return str(int(value))
+        return repr(float(value))
+    
+    @staticmethod
+    def _format_labels(labels: tuple) -> str:
+        if not labels:
+            return ''
+        escaped = (
+            f'{key}="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+            for key, value in labels
+        )
+        return '{' + ','.join(escaped) + '}'
+    
+    def render(self) -> str:
+        for collect in self._collectors:
+            try:
+                collect()
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {e}")
+        lines = []
+        for name, (kind, help_text, buckets) in self._metrics.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(self._series[name].items()):
+                if kind != 'histogram':
+                    lines.append(f"{name}{self._format_labels(labels)} {self._number(value)}")
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for bound, bucket_count in zip(buckets + (math.inf,), counts):
+                    cumulative += bucket_count
+                    le = self._number(bound) if math.isinf(bound) else repr(float(bound))
+                    lines.append(f"{name}_bucket{self._format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{self._format_labels(labels)} {self._number(total)}")
+                lines.append(f"{name}_count{self._format_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+class MetricsServer:
+    """Serves a metrics registry at GET /metrics over plain HTTP/1.1"""
+    
+    def __init__(self, registry: MetricsRegistry, host: str, port: int):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+    
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 10)
+            # Headers are not needed, read up to the blank line that ends them
+            while (await asyncio.wait_for(reader.readline(), 10)).strip():
+                pass
+            parts = request_line.decode('latin-1').split()
+            method, path = (parts[0], parts[1].split('?')[0]) if len(parts) >= 2 else ('', '')
+            if method in ('GET', 'HEAD') and path == '/metrics':
+                status, content_type = '200 OK', 'text/plain; version=0.0.4; charset=utf-8'
+                body = self.registry.render().encode()
+            else:
+                status, content_type, body = '404 Not Found', 'text/plain; charset=utf-8', b'Not found\n'
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                         f"Connection: close\r\n\r\n".encode() + (body if method != 'HEAD' else b''))
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError, UnicodeDecodeError):
+            pass
+        finally:
+            writer.close()
+    
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+class HttpClientPool:
+    """Long-lived httpx clients, one keep-alive connection pool per host"""
+    
+    def __init__(self, max_connections_per_host: int = 10, timeout: float = 30.0,
+                 keepalive_expiry: float = 60.0, http2: bool = False,
+                 host_limits: Optional[Dict[str, Dict]] = None, metrics: Optional[MetricsRegistry] = None):
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = timeout
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.host_limits = host_limits or {}
+        self.metrics = metrics
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+    
+    def _client_for(self, host: str) -> httpx.AsyncClient:
+        """Return the pooled client for a host, creating it on first use"""
+        client = self._clients.get(host)
+        if client is None:
+            overrides = self.host_limits.get(host, {})
+            max_connections = int(overrides.get('max_connections', self.max_connections_per_host))
+            transport = httpx.AsyncHTTPTransport(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                    keepalive_expiry=self.keepalive_expiry
+                )
+            )
+            client = httpx.AsyncClient(
+                transport=transport,
+                timeout=float(overrides.get('timeout', self.timeout))
+            )
+            self._clients[host] = client
+            self._stats[host] = {'requests': 0, 'connections': 0}
+        return client
+    
+    def _trace_for(self, host: str):
+        """Build an httpcore trace hook that counts new connections for a host"""
+        async def trace(event_name: str, info: Dict):
+            if event_name == 'connection.connect_tcp.complete':
+                self._stats[host]['connections'] += 1
+        return trace
+    
+    def _prepare(self, url: str, kwargs: Dict) -> httpx.AsyncClient:
+        host = urlparse(url).netloc
+        client = self._client_for(host)
+        self._stats[host]['requests'] += 1
+        kwargs.setdefault('extensions', {})['trace'] = self._trace_for(host)
+        return client
+    
+    def _record_error(self, url: str, status: str):
+        if self.metrics:
+            self.metrics.inc('feedmaster_http_errors_total', host=urlparse(url).netloc, status=status)
+    
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request over the host's pooled connection"""
+        client = self._prepare(url, kwargs)
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self._record_error(url, type(e).__name__)
+            raise
+        if response.status_code >= 400:
+            self._record_error(url, str(response.status_code))
+        return response
+    
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('GET', url, **kwargs)
+    
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('POST', url, **kwargs)
+    
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs):
+        """Stream a response over the host's pooled connection (async context manager)"""
+        client = self._prepare(url, kwargs)
+        try:
+            async with client.stream(method, url, **kwargs) as response:
+                if response.status_code >= 400:
+                    self._record_error(url, str(response.status_code))
+                yield response
+        except httpx.HTTPStatusError:
+            # Already counted by status code above
+            raise
+        except httpx.HTTPError as e:
+            self._record_error(url, type(e).__name__)
+            raise
+    
+    def stats(self) -> Dict[str, Dict]:
+        """Per-host request count, new connections and reuse ratio"""
+        stats = {}
+        for host, counts in self._stats.items():
+            requests = counts['requests']
+            stats[host] = {
+                'requests': requests,
+                'connections': counts['connections'],
+                'reuse_ratio': round(1 - counts['connections'] / requests, 3) if requests else 0.0
+            }
+        return stats
+    
+    async def aclose(self):
+        """Close every pooled client"""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta seconds or HTTP date) into seconds from now"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+TID_ALPHABET = '234567abcdefghijklmnopqrstuvwxyz'
+BLUESKY_ACCESS_TOKEN_LIFETIME_SECONDS = 2 * 3600  # Assumed when an access token carries no expiry
+TID_EPOCH_SECONDS = 1672531200  # 2023-01-01, start of the span achievement record key timestamps fall in
+
+def achievement_feed(achievement: Dict) -> str:
+    """Feed an achievement came from, empty when the API didn't say"""
+    return str(achievement.get('feed_id') or achievement.get('_feed_id') or '')
+
+def achievement_rkey(achievement: Dict) -> str:
+    """Deterministic TID record key for an achievement's Bluesky post
+    
+    The timestamp and clock ID both come from a hash of the achievement ID alone, so retries, restarts,
+    refetches after its outbox row was purged and FETCH_MODE switches all target the same record. Timestamps
+    land within 13 days of TID_EPOCH_SECONDS, the post's createdAt carries the real time.
+    """
+    mix = int.from_bytes(hashlib.sha256(str(achievement['id']).encode()).digest()[:8], 'big')
+    microseconds = TID_EPOCH_SECONDS * 1_000_000 + (mix >> 24)
+    value = (microseconds << 10) | (mix & 0x3ff)
+    return ''.join(TID_ALPHABET[(value >> shift) & 31] for shift in range(60, -1, -5))
+
+class PollScheduler:
+    """Adaptive poll interval with jitter, error backoff and server-requested delays"""
+    
+    def __init__(self, base_seconds: float, min_seconds: float, max_seconds: float,
+                 adaptive: bool = True, jitter: float = 0.1):
+        self.base_seconds = base_seconds
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.adaptive = adaptive
+        self.jitter = jitter
+        self.interval = base_seconds
+        self.consecutive_errors = 0
+        self._backoff_until = 0.0
+    
+    def record_poll(self, fetched: int, backlog_pending: bool):
+        """Poll sooner while achievements keep arriving, back off while quiet"""
+        self.consecutive_errors = 0
+        if not self.adaptive:
+            return
+        if backlog_pending:
+            self.interval = self.min_seconds
+        elif fetched:
+            self.interval = max(self.min_seconds, self.interval / 2)
+        else:
+            self.interval = min(self.max_seconds, self.interval * 1.5)
+    
+    def record_error(self):
+        self.consecutive_errors += 1
+    
+    def request_backoff(self, seconds: float):
+        """Don't poll again until the server says so"""
+        self._backoff_until = max(self._backoff_until, time.monotonic() + seconds)
+    
+    def next_delay(self) -> float:
+        """Seconds to sleep before the next poll"""
+        if self.consecutive_errors:
+            delay = min(self.max_seconds, 60 * 2 ** (self.consecutive_errors - 1))
+        else:
+            delay = self.interval
+        delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        # Never poll faster than the configured floor, whatever the jitter or error backoff says
+        return max(delay, self._backoff_until - time.monotonic(), self.min_seconds)
+
+class DiscordPublisher:
+    """Coalesces embeds into multi-embed webhook messages, paced by the webhook's rate-limit bucket"""
+    
+    MAX_EMBEDS = 10
+    
+    def __init__(self, http: HttpClientPool, webhook_url: str, batch_seconds: float = 2.0, max_attempts: int = 3):
+        self.http = http
+        self.webhook_url = webhook_url
+        self.batch_seconds = batch_seconds
+        self.max_attempts = max_attempts
+        self._queue: Optional[asyncio.Queue] = None
+        self._sender: Optional[asyncio.Task] = None
+        # Rate-limit bucket from the last response
+        self.bucket = None
+        self._remaining: Optional[int] = None
+        self._reset_at = 0.0
+        self.messages = 0
+        self.embeds = 0
+        self.rate_limited = 0
+    
+    async def send(self, embed: Dict) -> bool:
+        """Queue an embed for the next message and wait until it has been delivered (or failed)"""
+        if self._sender is None or self._sender.done():
+            self._queue = asyncio.Queue()
+            self._sender = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((embed, future))
+        return await future
+    
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            # Give the rest of the pipeline a moment to fill the message
+            deadline = time.monotonic() + self.batch_seconds
+            while len(batch) < self.MAX_EMBEDS:
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), max(0.0, deadline - time.monotonic())))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                success = await self._deliver([embed for embed, _ in batch])
+            except Exception as e:
+                logger.error(f"Failed to post to Discord: {e}")
+                success = False
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(success)
+    
+    async def _deliver(self, embeds: List[Dict]) -> bool:
+        for attempt in range(self.max_attempts):
+            # Wait out an exhausted bucket instead of provoking a 429
+            if self._remaining == 0 and time.monotonic() < self._reset_at:
+                await asyncio.sleep(self._reset_at - time.monotonic())
+            response = await self.http.post(self.webhook_url, json={"embeds": embeds})
+            self._update_bucket(response)
+            if response.status_code == 429:
+                self.rate_limited += 1
+                try:
+                    retry_after = float(response.json().get('retry_after'))
+                except (ValueError, TypeError, AttributeError):
+                    retry_after = parse_retry_after(response.headers.get('retry-after')) or 1.0
+                logger.warning(f"Discord rate limited, retrying in {retry_after:.1f}s")
+                self._remaining, self._reset_at = 0, time.monotonic() + retry_after
+                continue
+            response.raise_for_status()
+            self.messages += 1
+            self.embeds += len(embeds)
+            logger.info(f"Successfully posted {len(embeds)} achievements to Discord")
+            return True
+        logger.error(f"Discord still rate limited after {self.max_attempts} attempts")
+        return False
+    
+    def _update_bucket(self, response: httpx.Response):
+        headers = response.headers
+        if 'x-ratelimit-bucket' in headers:
+            self.bucket = headers['x-ratelimit-bucket']
+        try:
+            remaining = int(headers['x-ratelimit-remaining'])
+            reset_after = float(headers['x-ratelimit-reset-after'])
+        except (KeyError, ValueError):
+            return
+        self._remaining, self._reset_at = remaining, time.monotonic() + reset_after
+    
+    def stats(self) -> Dict:
+        return {
+            'messages': self.messages,
+            'embeds': self.embeds,
+            'rate_limited': self.rate_limited,
+            'bucket': self.bucket,
+            'remaining': self._remaining,
+        }
+    
+    async def close(self):
+        if self._sender:
+            self._sender.cancel()
+            await asyncio.gather(self._sender, return_exceptions=True)
+        while self._queue and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_result(False)
+
+class TokenBucket:
+    """Tokens refilled continuously up to capacity"""
+    
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated')
+    
+    def __init__(self, capacity: float, rate: float, tokens: float, updated: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = tokens
+        self.updated = updated
+
+class RateLimiter:
+    """Token buckets keyed by platform and account, on a monotonic clock"""
+    
+    def __init__(self):
+        self._buckets: Dict[str, TokenBucket] = {}
+    
+    def configure(self, key: str, capacity: float, per_hour: float):
+        """Allow bursts of capacity posts, refilled at per_hour posts per hour (starts full)"""
+        self._buckets[key] = TokenBucket(capacity, per_hour / 3600, capacity, time.monotonic())
+    
+    def _refill(self, key: str) -> Optional[TokenBucket]:
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            now = time.monotonic()
+            bucket.tokens = min(bucket.capacity, bucket.tokens + (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+        return bucket
+    
+    def acquire(self, key: str, tokens: float = 1.0) -> bool:
+        """Take tokens if available, unknown keys are unlimited"""
+        bucket = self._refill(key)
+        if bucket is None:
+            return True
+        if bucket.tokens < tokens:
+            return False
+        bucket.tokens -= tokens
+        return True
+    
+    def release(self, key: str, tokens: float = 1.0):
+        """Return tokens for a post that never went out"""
+        bucket = self._refill(key)
+        if bucket is not None:
+            bucket.tokens = min(bucket.capacity, bucket.tokens + tokens)
+    
+    def remaining(self, key: str) -> float:
+        bucket = self._refill(key)
+        return math.inf if bucket is None else bucket.tokens
+    
+    def wait_time(self, key: str, tokens: float = 1.0) -> float:
+        """Seconds until tokens are available"""
+        bucket = self._refill(key)
+        if bucket is None or bucket.tokens >= tokens:
+            return 0.0
+        if bucket.rate <= 0:
+            return math.inf
+        return (tokens - bucket.tokens) / bucket.rate
+    
+    def snapshot(self) -> Dict[str, float]:
+        """Current tokens per key, for persisting"""
+        return {key: self.remaining(key) for key in self._buckets}
+    
+    def restore(self, saved: Dict[str, tuple]):
+        """Load persisted (tokens, wall-clock time saved) per key, refilling for the time spent stopped"""
+        now = time.time()
+        for key, (tokens, saved_at) in saved.items():
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                elapsed = max(0.0, now - saved_at)
+                bucket.tokens = min(bucket.capacity, tokens + elapsed * bucket.rate)
+                bucket.updated = time.monotonic()
+
+class AchievementOutbox:
+    """Durable SQLite outbox tracking each fetched achievement's delivery state per platform"""
+    
+    PENDING = 'pending'
+    POSTED = 'posted'
+    FAILED = 'failed'
+    SKIPPED = 'skipped'
+    DIGESTED = 'digested'
+    INTERRUPTED = 'interrupted'  # last_error of a delivery whose attempt never reported back
+    
+    def __init__(self, path: str, max_attempts: int = 3):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_attempts = max_attempts
+        # Autocommit mode, transactions are opened explicitly for batched writes
+        self.db = sqlite3.connect(path, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS achievements (
+                id INTEGER PRIMARY KEY,
+                payload TEXT NOT NULL,
+                rarity_percentage REAL,
+                fetched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS deliveries (
+                achievement_id INTEGER NOT NULL REFERENCES achievements(id),
+                platform TEXT NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (achievement_id, platform)
+            );
+            CREATE INDEX IF NOT EXISTS deliveries_state ON deliveries(state, platform);
+            CREATE TABLE IF NOT EXISTS cursors (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                saved_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS blob_refs (
+                account TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                cid TEXT NOT NULL,
+                mime_type TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                uploaded_at REAL NOT NULL,
+                PRIMARY KEY (account, sha256)
+            );
+        """)
+    
+    def get_cursors(self) -> Dict[str, int]:
+        """All saved cursors by name"""
+        return {row['name']: row['value'] for row in self.db.execute('SELECT name, value FROM cursors')}
+    
+    def set_cursors(self, cursors: Dict[str, int]):
+        with self.db:
+            self._write_cursors(cursors)
+    
+    def _write_cursors(self, cursors: Dict[str, int]):
+        self.db.executemany(
+            'INSERT INTO cursors (name, value) VALUES (?, ?) '
+            'ON CONFLICT(name) DO UPDATE SET value = MAX(value, excluded.value)',
+            list(cursors.items())
+        )
+    
+    def record_batch(self, achievements: List[Dict], targets: Dict[int, List[str]], platforms: List[str], cursors: Dict[str, int]):
+        """Record a fetched batch and advance cursors in a single transaction
+        
+        targets maps eligible achievement IDs to the platforms they should be posted to;
+        every other achievement/platform pair is recorded as skipped.
+        """
+        now = time.time()
+        achievement_rows = []
+        delivery_rows = []
+        for achievement in achievements:
+            achievement_id = achievement.get('id')
+            if achievement_id is None:
+                continue
+            achievement_rows.append((achievement_id, json.dumps(achievement), achievement.get('rarity_percentage'), now))
+            achievement_targets = targets.get(achievement_id, ())
+            delivery_rows.extend(
+                (achievement_id, platform, self.PENDING if platform in achievement_targets else self.SKIPPED, now)
+                for platform in platforms
+            )
+        
+        self.db.execute('BEGIN')
+        try:
+            self.db.executemany('INSERT OR IGNORE INTO achievements (id, payload, rarity_percentage, fetched_at) VALUES (?, ?, ?, ?)', achievement_rows)
+            self.db.executemany('INSERT OR IGNORE INTO deliveries (achievement_id, platform, state, updated_at) VALUES (?, ?, ?, ?)', delivery_rows)
+            self._write_cursors(cursors)
+            self.db.execute('COMMIT')
+        except Exception:
+            self.db.execute('ROLLBACK')
+            raise
+    
+    def pending_entries(self, platforms: List[str]) -> List[tuple]:
+        """(id, rarity_percentage, fetched_at) of every achievement with a pending delivery"""
+        placeholders = ','.join('?' * len(platforms))
+        rows = self.db.execute(
+            'SELECT DISTINCT a.id, a.rarity_percentage, a.fetched_at FROM deliveries d '
+            'JOIN achievements a ON a.id = d.achievement_id '
+            f'WHERE d.state = ? AND d.platform IN ({placeholders})',
+            [self.PENDING, *platforms]
+        )
+        return [(row['id'], row['rarity_percentage'], row['fetched_at']) for row in rows]
+    
+    def load_pending(self, achievement_ids: List[int], platforms: List[str]) -> List[tuple]:
+        """(achievement, fetched_at, pending platforms) for the given IDs, in the given order"""
+        if not achievement_ids:
+            return []
+        id_placeholders = ','.join('?' * len(achievement_ids))
+        platform_placeholders = ','.join('?' * len(platforms))
+        rows = self.db.execute(
+            'SELECT a.id, a.payload, a.fetched_at, GROUP_CONCAT(d.platform) AS platforms FROM deliveries d '
+            'JOIN achievements a ON a.id = d.achievement_id '
+            f'WHERE a.id IN ({id_placeholders}) AND d.state = ? AND d.platform IN ({platform_placeholders}) '
+            'GROUP BY a.id',
+            [*achievement_ids, self.PENDING, *platforms]
+        )
+        found = {row['id']: (json.loads(row['payload']), row['fetched_at'], row['platforms'].split(',')) for row in rows}
+        return [found[achievement_id] for achievement_id in achievement_ids if achievement_id in found]
+    
+    def mark(self, achievement_id: int, platform: str, success: bool, error: Optional[str] = None):
+        """Record a delivery attempt, failing permanently after max_attempts"""
+        if success:
+            self.db.execute(
+                'UPDATE deliveries SET state = ?, attempts = attempts + 1, last_error = NULL, updated_at = ? '
+                'WHERE achievement_id = ? AND platform = ?',
+                (self.POSTED, time.time(), achievement_id, platform)
+            )
+        else:
+            self.db.execute(
+                'UPDATE deliveries SET attempts = attempts + 1, last_error = ?, updated_at = ?, '
+                'state = CASE WHEN attempts + 1 >= ? THEN ? ELSE state END '
+                'WHERE achievement_id = ? AND platform = ?',
+                (error, time.time(), self.max_attempts, self.FAILED, achievement_id, platform)
+            )
+    
+    def mark_started(self, achievement_id: int, platforms: List[str]):
+        """Flag deliveries about to be attempted, so a crash before mark() still shows an earlier attempt"""
+        self.db.executemany(
+            'UPDATE deliveries SET last_error = COALESCE(last_error, ?), updated_at = ? WHERE achievement_id = ? AND platform = ?',
+            [(self.INTERRUPTED, time.time(), achievement_id, platform) for platform in platforms]
+        )
+    
+    def attempted_platforms(self, achievement_id: int) -> set:
+        """Platforms an earlier run tried to deliver the achievement to"""
+        rows = self.db.execute(
+            'SELECT platform FROM deliveries WHERE achievement_id = ? AND (attempts > 0 OR last_error IS NOT NULL)',
+            (achievement_id,)
+        )
+        return {row['platform'] for row in rows}
+    
+    def skip(self, achievement_ids: List[int], reason: str):
+        """Mark every pending delivery of the given achievements as skipped"""
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                'UPDATE deliveries SET state = ?, last_error = ?, updated_at = ? WHERE achievement_id = ? AND state = ?',
+                [(self.SKIPPED, reason, now, achievement_id, self.PENDING) for achievement_id in achievement_ids]
+            )
+    
+    def mark_digested(self, achievement_ids: List[int], platform: str):
+        """Mark the platform's pending deliveries of the given achievements as covered by a digest post"""
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                'UPDATE deliveries SET state = ?, attempts = attempts + 1, last_error = NULL, updated_at = ? '
+                'WHERE achievement_id = ? AND platform = ? AND state = ?',
+                [(self.DIGESTED, now, achievement_id, platform, self.PENDING) for achievement_id in achievement_ids]
+            )
+    
+    def feed_counts(self, achievement_ids: List[int]) -> Dict[str, int]:
+        """Number of the given achievements from each feed"""
+        counts: Dict[str, int] = {}
+        for start in range(0, len(achievement_ids), 500):
+            chunk = achievement_ids[start:start + 500]
+            rows = self.db.execute(
+                f"SELECT payload FROM achievements WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            )
+            for row in rows:
+                feed = achievement_feed(json.loads(row['payload']))
+                counts[feed] = counts.get(feed, 0) + 1
+        return counts
+    
+    def recently_posted(self, limit: int) -> List[Dict]:
+        """Most recently posted achievements, newest first"""
+        rows = self.db.execute(
+            'SELECT a.payload FROM achievements a JOIN deliveries d ON d.achievement_id = a.id '
+            'WHERE d.state = ? GROUP BY a.id ORDER BY MAX(d.updated_at) DESC LIMIT ?',
+            (self.POSTED, limit)
+        )
+        return [json.loads(row['payload']) for row in rows]
+    
+    def counts(self) -> Dict[str, int]:
+        """Delivery rows per state"""
+        return {row['state']: row['total'] for row in self.db.execute('SELECT state, COUNT(*) AS total FROM deliveries GROUP BY state')}
+    
+    def get_rate_limits(self) -> Dict[str, tuple]:
+        """Saved (tokens, saved_at) per rate limit key"""
+        return {row['key']: (row['tokens'], row['saved_at']) for row in self.db.execute('SELECT key, tokens, saved_at FROM rate_limits')}
+    
+    def save_rate_limits(self, tokens: Dict[str, float]):
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                'INSERT OR REPLACE INTO rate_limits (key, tokens, saved_at) VALUES (?, ?, ?)',
+                [(key, value, now) for key, value in tokens.items()]
+            )
+    
+    def get_blob_ref(self, account: str, sha256: str, max_age_seconds: float) -> Optional[sqlite3.Row]:
+        """Blob uploaded for identical content within the reuse window, if any"""
+        return self.db.execute(
+            'SELECT cid, mime_type, size FROM blob_refs WHERE account = ? AND sha256 = ? AND uploaded_at >= ?',
+            (account, sha256, time.time() - max_age_seconds)
+        ).fetchone()
+    
+    def save_blob_ref(self, account: str, sha256: str, cid: str, mime_type: str, size: int):
+        with self.db:
+            self.db.execute(
+                'INSERT OR REPLACE INTO blob_refs (account, sha256, cid, mime_type, size, uploaded_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (account, sha256, cid, mime_type, size, time.time())
+            )
+    
+    def forget_blob_ref(self, account: str, sha256: str):
+        with self.db:
+            self.db.execute('DELETE FROM blob_refs WHERE account = ? AND sha256 = ?', (account, sha256))
+    
+    def purge(self, older_than_days: float):
+        """Delete achievements whose deliveries all finished, and blob refs uploaded, before the retention window"""
+        cutoff = time.time() - older_than_days * 86400
+        with self.db:
+            self.db.execute(
+                'DELETE FROM deliveries WHERE achievement_id IN ('
+                'SELECT achievement_id FROM deliveries GROUP BY achievement_id '
+                'HAVING MAX(updated_at) < ? AND SUM(state = ?) = 0)',
+                (cutoff, self.PENDING)
+            )
+            self.db.execute('DELETE FROM achievements WHERE id NOT IN (SELECT achievement_id FROM deliveries)')
+            self.db.execute('DELETE FROM blob_refs WHERE uploaded_at < ?', (cutoff,))
+    
+    def close(self):
+        self.db.close()
+
+class CardTemplate:
+    """Achievement card layout with its static layers (background, masks, fonts, badges) built once"""
+    
+    WIDTH, HEIGHT = 1200, 630
+    AVATAR_SIZE = 200
+    BORDER_SIZE = 8
+    TOP_COLOR = (43, 45, 49)
+    BOTTOM_COLOR = (88, 101, 242)
+    FOOTER_TEXT = "feedmaster"
+    FONT_PATHS = [
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+        "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf",
+        "/System/Library/Fonts/Arial.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+    ]
+    RARITY_COLORS = {
+        'Mythic': (255, 0, 255),
+        'Legendary': (148, 0, 211),
+        'Diamond': (185, 242, 255),
+        'Platinum': (229, 228, 226),
+        'Gold': (255, 215, 0),
+        'Silver': (192, 192, 192),
+        'Bronze': (205, 127, 50)
+    }
+    
+    def __init__(self):
+        self.fonts = {size: self._load_font(size) for size in (48, 32, 28, 18, 14)}
+        
+        # Circular avatar mask and the white ring drawn behind it
+        self.avatar_mask = Image.new('L', (self.AVATAR_SIZE, self.AVATAR_SIZE), 0)
+        ImageDraw.Draw(self.avatar_mask).ellipse([0, 0, self.AVATAR_SIZE, self.AVATAR_SIZE], fill=255)
+        ring_size = self.AVATAR_SIZE + self.BORDER_SIZE * 2
+        self.ring_mask = Image.new('L', (ring_size, ring_size), 0)
+        ImageDraw.Draw(self.ring_mask).ellipse([0, 0, ring_size, ring_size], fill=255)
+        self.ring_position = (self.WIDTH // 2 - ring_size // 2, self.HEIGHT // 2 - ring_size // 2)
+        self.avatar_position = (self.WIDTH // 2 - self.AVATAR_SIZE // 2, self.HEIGHT // 2 - self.AVATAR_SIZE // 2)
+        
+        self.background = self._build_background()
+        self._badges: Dict[str, tuple] = {}
+    
+    def _load_font(self, size: int):
+        """Get font with multiple fallbacks"""
+        for font_path in self.FONT_PATHS:
+            try:
+                return ImageFont.truetype(font_path, size)
+            except OSError:
+                continue
+        
+        # If all fail, use default font with original size
+        logger.warning(f"All fonts failed, using default with size {size}")
+        try:
+            return ImageFont.load_default(size)
+        except TypeError:
+            return ImageFont.load_default()
+    
+    def _build_background(self) -> Image.Image:
+        """Gradient from dark blue to purple with the footer text, drawn once"""
+        # Compute one column of row colors, then stretch it across the width in C
+        column = bytearray()
+        for y in range(self.HEIGHT):
+            ratio = y / self.HEIGHT
+            column.extend(int(top + (bottom - top) * ratio) for top, bottom in zip(self.TOP_COLOR, self.BOTTOM_COLOR))
+        background = Image.frombytes('RGB', (1, self.HEIGHT), bytes(column)).resize((self.WIDTH, self.HEIGHT), Image.Resampling.NEAREST)
+        
+        draw = ImageDraw.Draw(background)
+        footer_font = self.fonts[28]
+        footer_bbox = draw.textbbox((0, 0), self.FOOTER_TEXT, font=footer_font)
+        footer_width = footer_bbox[2] - footer_bbox[0]
+        draw.text((self.WIDTH // 2 - footer_width // 2, self.HEIGHT - 80), self.FOOTER_TEXT, fill=(180, 180, 180), font=footer_font)
+        return background
+    
+    def _badge(self, rarity_tier: str) -> tuple:
+        """Rarity badge layer and its position, rendered once per tier"""
+        if rarity_tier not in self._badges:
+            rarity_font = self.fonts[18]
+            rarity_text = f"{rarity_tier} Achievement"
+            rarity_bbox = ImageDraw.Draw(self.background).textbbox((0, 0), rarity_text, font=rarity_font)
+            rarity_width = rarity_bbox[2] - rarity_bbox[0]
+            rarity_height = rarity_bbox[3] - rarity_bbox[1]
+            
+            # Badge sits below the achievement name, text centered within it
+            badge_padding = 12
+            badge_x = self.WIDTH // 2 - rarity_width // 2 - badge_padding
+            badge_y = 120
+            badge_width = rarity_width + badge_padding * 2
+            badge_height = rarity_height + badge_padding * 2
+            badge = Image.new('RGBA', (badge_width + 1, badge_height + 1), (0, 0, 0, 0))
+            draw = ImageDraw.Draw(badge)
+            draw.rounded_rectangle([0, 0, badge_width, badge_height], radius=12,
+                                   fill=self.RARITY_COLORS.get(rarity_tier, (205, 127, 50)))
+            draw.text((self.WIDTH // 2 - rarity_width // 2 - badge_x, badge_padding), rarity_text, fill=(0, 0, 0), font=rarity_font)
+            self._badges[rarity_tier] = (badge, (badge_x, badge_y))
+        return self._badges[rarity_tier]
+    
+    def render(self, achievement_name: str, user_name: str, rarity_tier: str, avatar: Optional[Image.Image]) -> Image.Image:
+        """Composite the per-achievement layers onto a copy of the static background"""
+        img = self.background.copy()
+        draw = ImageDraw.Draw(img)
+        
+        if avatar is not None:
+            img.paste((255, 255, 255), self.ring_position, self.ring_mask)
+            img.paste(avatar, self.avatar_position, self.avatar_mask)
+        
+        # Achievement name at top
+        achievement_font = self.fonts[48]
+        achievement_bbox = draw.textbbox((0, 0), achievement_name, font=achievement_font)
+        achievement_width = achievement_bbox[2] - achievement_bbox[0]
+        draw.text((self.WIDTH // 2 - achievement_width // 2, 50), achievement_name, fill=(255, 255, 255), font=achievement_font)
+        
+        # User name below avatar
+        user_font = self.fonts[32]
+        user_bbox = draw.textbbox((0, 0), user_name, font=user_font)
+        user_width = user_bbox[2] - user_bbox[0]
+        draw.text((self.WIDTH // 2 - user_width // 2, self.HEIGHT // 2 + 150), user_name, fill=(220, 221, 222), font=user_font)
+        
+        badge, badge_position = self._badge(rarity_tier)
+        img.paste(badge, badge_position, badge)
+        return img
+    
+    def render_digest(self, title: str, entries: List[tuple]) -> Image.Image:
+        """Grid of (rarity_tier, avatar) entries as circular avatars ringed and badged by tier, under a title"""
+        img = self.background.copy()
+        draw = ImageDraw.Draw(img)
+        
+        title_font = self.fonts[48]
+        title_bbox = draw.textbbox((0, 0), title, font=title_font)
+        draw.text((self.WIDTH // 2 - (title_bbox[2] - title_bbox[0]) // 2, 40), title, fill=(255, 255, 255), font=title_font)
+        
+        # Use the column count that gives the largest cells between the title and the footer
+        grid_top, grid_width, grid_height = 120, self.WIDTH - 120, self.HEIGHT - 220
+        count = len(entries)
+        columns = max(range(1, count + 1), key=lambda c: min(grid_width / c, grid_height / math.ceil(count / c)))
+        rows = math.ceil(count / columns)
+        cell = int(min(grid_width / columns, grid_height / rows))
+        avatar_size = int(cell * 0.55)
+        ring_size = avatar_size + max(2, avatar_size // 25) * 2
+        avatar_mask = self.avatar_mask.resize((avatar_size, avatar_size), Image.Resampling.LANCZOS)
+        ring_mask = self.ring_mask.resize((ring_size, ring_size), Image.Resampling.LANCZOS)
+        badge_font = self.fonts[18 if cell >= 120 else 14]
+        top = grid_top + (grid_height - rows * cell) // 2
+        
+        for index, (rarity_tier, avatar) in enumerate(entries):
+            row, column = divmod(index, columns)
+            # Center the last, possibly shorter, row
+            in_row = min(columns, count - row * columns)
+            center_x = (self.WIDTH - in_row * cell) // 2 + column * cell + cell // 2
+            ring_y = top + row * cell
+            color = self.RARITY_COLORS.get(rarity_tier, (205, 127, 50))
+            
+            img.paste(color, (center_x - ring_size // 2, ring_y), ring_mask)
+            avatar_position = (center_x - avatar_size // 2, ring_y + (ring_size - avatar_size) // 2)
+            if avatar is not None:
+                img.paste(avatar.resize((avatar_size, avatar_size), Image.Resampling.LANCZOS), avatar_position, avatar_mask)
+            else:
+                img.paste((100, 100, 100), avatar_position, avatar_mask)
+            
+            # Tier badge below the avatar
+            text_bbox = draw.textbbox((0, 0), rarity_tier, font=badge_font)
+            text_width, text_height = text_bbox[2] - text_bbox[0], text_bbox[3] - text_bbox[1]
+            padding = 5
+            badge_x, badge_y = center_x - text_width // 2 - padding, ring_y + ring_size + 6
+            draw.rounded_rectangle([badge_x, badge_y, badge_x + text_width + padding * 2, badge_y + text_height + padding * 2],
+                                   radius=8, fill=color)
+            draw.text((badge_x + padding - text_bbox[0], badge_y + padding - text_bbox[1]), rarity_tier, fill=(0, 0, 0), font=badge_font)
+        return img
+
+_worker_state = threading.local()
+
+def _worker_card_template() -> CardTemplate:
+    """Per-process (and per-thread) template, built on first use in each render worker"""
+    template = getattr(_worker_state, 'card_template', None)
+    if template is None:
+        template = _worker_state.card_template = CardTemplate()
+    return template
+
+# Output formats for achievement cards: Pillow format and blob mime type
+CARD_FORMATS = {
+    'png': ('PNG', 'image/png'),
+    'png8': ('PNG', 'image/png'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+    'webp': ('WEBP', 'image/webp'),
+}
+
+def _encode_image(img: Image.Image, card_format: str, quality: int) -> bytes:
+    buffer = BytesIO()
+    if card_format == 'png8':
+        # quality is the palette size for palette-quantized PNGs
+        img.quantize(colors=quality, method=Image.Quantize.FASTOCTREE).save(buffer, 'PNG')
+    elif card_format == 'png':
+        img.save(buffer, 'PNG')
+    else:
+        img.save(buffer, CARD_FORMATS[card_format][0], quality=quality)
+    return buffer.getvalue()
+
+def encode_card(img: Image.Image, card_format: str = 'png', max_bytes: int = 950000, quality: int = 85) -> bytes:
+    """Encode a card at the highest quality that fits in max_bytes, or as small as possible if none does"""
+    if card_format == 'png':
+        data = _encode_image(img, 'png', 0)
+        if len(data) <= max_bytes:
+            return data
+        # Lossless output is over budget, fall back to a palette
+        card_format = 'png8'
+    if card_format == 'png8':
+        quality, floor = 256, 16
+    else:
+        floor = 10
+    data = _encode_image(img, card_format, quality)
+    if len(data) <= max_bytes:
+        return data
+    
+    # Binary search for the highest quality that fits
+    smallest, best = data, None
+    low, high = floor, quality - 1
+    while low <= high:
+        middle = (low + high) // 2
+        candidate = _encode_image(img, card_format, middle)
+        if len(candidate) <= max_bytes:
+            best = candidate
+            low = middle + 1
+        else:
+            if len(candidate) < len(smallest):
+                smallest = candidate
+            high = middle - 1
+    return best if best is not None else smallest
+
+def render_card_bytes(achievement_name: str, user_name: str, rarity_tier: str, avatar_rgba: Optional[bytes],
+                      card_format: str = 'png', max_bytes: int = 950000, quality: int = 85) -> bytes:
+    """Render and encode one card inside a render worker"""
+    avatar = None
+    if avatar_rgba is not None:
+        avatar = Image.frombytes('RGBA', (CardTemplate.AVATAR_SIZE, CardTemplate.AVATAR_SIZE), avatar_rgba)
+    img = _worker_card_template().render(achievement_name, user_name, rarity_tier, avatar)
+    return encode_card(img, card_format, max_bytes, quality)
+
+def render_digest_bytes(title: str, entries: List[tuple], card_format: str = 'png', max_bytes: int = 950000, quality: int = 85) -> bytes:
+    """Render and encode a digest collage of (rarity_tier, avatar_rgba) entries inside a render worker"""
+    size = (CardTemplate.AVATAR_SIZE, CardTemplate.AVATAR_SIZE)
+    entries = [(rarity_tier, None if avatar_rgba is None else Image.frombytes('RGBA', size, avatar_rgba))
+               for rarity_tier, avatar_rgba in entries]
+    img = _worker_card_template().render_digest(title, entries)
+    return encode_card(img, card_format, max_bytes, quality)
+
+class CardRenderer:
+    """Async front end that renders cards in a process pool (or thread pool) off the event loop"""
+    
+    def __init__(self, workers: int, mode: str = 'process', card_format: str = 'png', max_bytes: int = 950000, quality: int = 85):
+        self.workers = workers
+        self.mode = mode
+        self.card_format = card_format
+        self.max_bytes = max_bytes
+        self.quality = quality
+        if mode == 'process':
+            # Workers start after the event loop, thread pools and SQLite connection exist, so never fork them
+            self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=_worker_card_template)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='card-render')
+    
+    @staticmethod
+    def _avatar_bytes(avatar: Optional[Image.Image]) -> Optional[bytes]:
+        if avatar is None:
+            return None
+        return avatar.convert('RGBA').resize((CardTemplate.AVATAR_SIZE, CardTemplate.AVATAR_SIZE)).tobytes()
+    
+    async def render(self, achievement_name: str, user_name: str, rarity_tier: str, avatar: Optional[Image.Image]) -> bytes:
+        """Render one card and return the encoded bytes"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, render_card_bytes, achievement_name, user_name, rarity_tier,
+                                          self._avatar_bytes(avatar), self.card_format, self.max_bytes, self.quality)
+    
+    async def render_digest(self, title: str, entries: List[tuple]) -> bytes:
+        """Render a digest collage of (rarity_tier, avatar) entries and return the encoded bytes"""
+        entries = [(rarity_tier, self._avatar_bytes(avatar)) for rarity_tier, avatar in entries]
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, render_digest_bytes, title, entries,
+                                          self.card_format, self.max_bytes, self.quality)
+    
+    async def render_batch(self, cards: List[tuple]) -> List[Optional[bytes]]:
+        """Render (achievement_name, user_name, rarity_tier, avatar) tuples in parallel across workers"""
+        results = await asyncio.gather(*(self.render(*card) for card in cards), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Failed to render achievement card: {result}")
+        return [None if isinstance(result, Exception) else result for result in results]
+    
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+def card_template_version() -> str:
+    """Fingerprint of the card layout code and fonts, so cached cards expire when either changes"""
+    digest = hashlib.sha256()
+    for part in (CardTemplate, render_card_bytes, encode_card, _encode_image):
+        try:
+            digest.update(inspect.getsource(part).encode())
+        except (OSError, TypeError):
+            digest.update(part.__qualname__.encode())
+    for path in CardTemplate.FONT_PATHS:
+        if os.path.exists(path):
+            digest.update(f"{path}:{os.path.getsize(path)}".encode())
+            break
+    return digest.hexdigest()[:16]
+
+class CardCache:
+    """Encoded card bytes in a small in-memory LRU in front of a size and age bounded disk tier"""
+    
+    # Only files named like the cache's own are touched, CARD_CACHE_DIR may be a shared directory
+    CARD_NAME = re.compile(r'[0-9a-f]{64}\.card')
+    LEFTOVER_NAME = re.compile(r'[0-9a-f]{32}\.png|\.card-\w+\.tmp')  # Older MD5-named PNG cards and interrupted writes
+    
+    def __init__(self, directory: str, memory_bytes: int, max_bytes: int, max_age_seconds: float):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.version = card_template_version()
+        self._memory: OrderedDict = OrderedDict()
+        self._memory_size = 0
+        # Disk index key -> (size, last used), oldest first
+        self._disk: OrderedDict = OrderedDict()
+        self._disk_size = 0
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+    
+    def key(self, *parts: str) -> str:
+        """Cache key for the card inputs under the current template version"""
+        return hashlib.sha256(':'.join((self.version,) + parts).encode()).hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.card")
+    
+    def _scan(self):
+        """Index existing cards by last use, dropping leftovers from older template versions"""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if self.LEFTOVER_NAME.fullmatch(name):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            if not self.CARD_NAME.fullmatch(name):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name[:-5], stat.st_size))
+        for last_used, key, size in sorted(entries):
+            self._disk[key] = (size, last_used)
+            self._disk_size += size
+        self._evict_disk()
+    
+    def _evict_disk(self):
+        cutoff = time.time() - self.max_age_seconds
+        while self._disk:
+            key, (size, last_used) = next(iter(self._disk.items()))
+            if self._disk_size <= self.max_bytes and last_used >= cutoff:
+                break
+            self._remove_disk(key)
+            self.evictions += 1
+    
+    def _remove_disk(self, key: str):
+        size, _ = self._disk.pop(key)
+        self._disk_size -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+    
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_size -= len(self._memory.pop(key))
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+    
+    def get(self, key: str) -> Optional[bytes]:
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self.hits_memory += 1
+            return data
+        entry = self._disk.get(key)
+        if entry is not None:
+            size, last_used = entry
+            now = time.time()
+            if now - last_used > self.max_age_seconds:
+                self._remove_disk(key)
+                self.evictions += 1
+            else:
+                try:
+                    with open(self._path(key), 'rb') as f:
+                        data = f.read()
+                    # mtime doubles as the last-use time so LRU order survives restarts
+                    os.utime(self._path(key), (now, now))
+                except OSError:
+                    self._remove_disk(key)
+                else:
+                    self._disk[key] = (size, now)
+                    self._disk.move_to_end(key)
+                    self._remember(key, data)
+                    self.hits_disk += 1
+                    return data
+        self.misses += 1
+        return None
+    
+    def put(self, key: str, data: bytes):
+        """Store a card, writing the disk copy atomically"""
+        self._remember(key, data)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.card-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"Failed to write card cache entry: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        if key in self._disk:
+            self._disk_size -= self._disk.pop(key)[0]
+        self._disk[key] = (len(data), time.time())
+        self._disk_size += len(data)
+        self._evict_disk()
+    
+    def stats(self) -> Dict:
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {
+            'hits_memory': self.hits_memory,
+            'hits_disk': self.hits_disk,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': (self.hits_memory + self.hits_disk) / lookups if lookups else 0.0,
+            'memory_bytes': self._memory_size,
+            'disk_entries': len(self._disk),
+            'disk_bytes': self._disk_size,
+        }
+
+class AvatarCache:
+    """Pre-resized avatars with HTTP revalidation and single-flight fetching per URL"""
+    
+    def __init__(self, http: HttpClientPool, size: int, memory_bytes: int, ttl_seconds: float):
+        self.http = http
+        self.size = size
+        self.memory_bytes = memory_bytes
+        self.ttl_seconds = ttl_seconds
+        # url -> (RGBA bytes, etag, last_modified, validated_at), least recently used first
+        self._entries: OrderedDict = OrderedDict()
+        self._memory_size = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.revalidated = 0
+        self.downloads = 0
+    
+    async def get(self, url: str) -> Image.Image:
+        """Avatar at card size, fetching at most once at a time per URL"""
+        entry = self._entries.get(url)
+        if entry is not None and time.monotonic() - entry[3] < self.ttl_seconds:
+            self._entries.move_to_end(url)
+            self.hits += 1
+            return self._image(entry[0])
+        future = self._inflight.get(url)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(url, entry))
+            self._inflight[url] = future
+            future.add_done_callback(lambda _: self._inflight.pop(url, None))
+        return self._image(await asyncio.shield(future))
+    
+    def _image(self, data: bytes) -> Image.Image:
+        return Image.frombytes('RGBA', (self.size, self.size), data)
+    
+    async def _fetch(self, url: str, entry: Optional[tuple]) -> bytes:
+        headers = {}
+        if entry is not None:
+            if entry[1]:
+                headers['If-None-Match'] = entry[1]
+            if entry[2]:
+                headers['If-Modified-Since'] = entry[2]
+        try:
+            response = await self.http.get(url, headers=headers, timeout=10)
+            if response.status_code == 304 and entry is not None:
+                self.revalidated += 1
+                self._store(url, entry[0], entry[1], entry[2])
+                return entry[0]
+            response.raise_for_status()
+        except Exception:
+            if entry is not None:
+                # Serve the stale copy while the avatar host is unavailable
+                return entry[0]
+            raise
+        self.downloads += 1
+        # Decoding and resizing take milliseconds of CPU, keep them off the event loop
+        data = await asyncio.get_running_loop().run_in_executor(None, self._decode, response.content)
+        self._store(url, data, response.headers.get('etag'), response.headers.get('last-modified'))
+        return data
+    
+    def _decode(self, content: bytes) -> bytes:
+        img = Image.open(BytesIO(content))
+        # JPEGs decode at the smallest DCT scale that still covers the card size
+        img.draft('RGB', (self.size, self.size))
+        img = img.convert('RGBA')
+        return img.resize((self.size, self.size), Image.Resampling.LANCZOS).tobytes()
+    
+    def _store(self, url: str, data: bytes, etag: Optional[str], last_modified: Optional[str]):
+        previous = self._entries.pop(url, None)
+        if previous is not None:
+            self._memory_size -= len(previous[0])
+        self._entries[url] = (data, etag, last_modified, time.monotonic())
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._memory_size -= len(evicted[0])
+    
+    def stats(self) -> Dict:
+        return {
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'downloads': self.downloads,
+            'entries': len(self._entries),
+        }
+
+class OpenGraphParser(HTMLParser):
+    """Incremental parser for the meta tags and title in a page's <head>"""
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta: Dict[str, str] = {}
+        self.title = ''
+        self.done = False
+        self._in_title = False
+    
+    def handle_starttag(self, tag: str, attrs: List[tuple]):
+        if tag == 'meta':
+            attrs = dict(attrs)
+            key = (attrs.get('property') or attrs.get('name') or '').lower()
+            content = (attrs.get('content') or '').strip()
+            if key and content:
+                self.meta.setdefault(key, content)
+        elif tag == 'title':
+            self._in_title = True
+        elif tag == 'body':
+            self.done = True
+    
+    def handle_endtag(self, tag: str):
+        if tag == 'title':
+            self._in_title = False
+        elif tag == 'head':
+            self.done = True
+    
+    def handle_data(self, data: str):
+        if self._in_title:
+            self.title += data
+
+class TTLCache:
+    """Bounded in-memory cache whose entries expire a fixed time after they were stored"""
+    
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[1] > self.ttl_seconds:
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+    
+    def put(self, key, value):
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict:
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+class FeedRule:
+    """Compiled routing rule for one feed"""
+    
+    __slots__ = ('name', 'min_level', 'allow', 'deny', 'cooldown_seconds', 'platforms', 'message_template')
+    
+    def __init__(self, name: str, min_level: int, allow: Optional[frozenset], deny: frozenset,
+                 cooldown_seconds: float, platforms: Optional[tuple], message_template: Optional[str]):
+        self.name = name
+        self.min_level = min_level
+        self.allow = allow
+        self.deny = deny
+        self.cooldown_seconds = cooldown_seconds
+        self.platforms = platforms
+        self.message_template = message_template
+
+class RoutingRules:
+    """Per-feed filtering and routing rules compiled into lookup tables"""
+    
+    def __init__(self, config: Dict, rarity_order: Dict[str, int], default_min_tier: str):
+        self.rarity_order = rarity_order
+        default_config = {'min_rarity_tier': default_min_tier, **config.get('default', {})}
+        self.default = self._compile('default', default_config, None)
+        self.feeds = {
+            str(feed_id): self._compile(f"feed {feed_id}", feed_config, self.default)
+            for feed_id, feed_config in config.get('feeds', {}).items()
+        }
+        self._last_posted: Dict[tuple, float] = {}  # (rule name, user handle) -> last post time
+    
+    @classmethod
+    def from_file(cls, path: Optional[str], rarity_order: Dict[str, int], default_min_tier: str) -> 'RoutingRules':
+        """Load and compile a JSON rules file, or build default-only rules without one"""
+        config = {}
+        if path:
+            with open(path, 'r') as f:
+                config = json.load(f)
+        return cls(config, rarity_order, default_min_tier)
+    
+    def _compile(self, name: str, config: Dict, parent: Optional[FeedRule]) -> FeedRule:
+        """Turn one rules section into a FeedRule, inheriting unset keys from parent"""
+        def setting(key: str, attribute: str, convert, default=None):
+            if key in config:
+                return convert(config[key])
+            return getattr(parent, attribute) if parent else default
+        
+        min_tier = config.get('min_rarity_tier')
+        if min_tier is not None and min_tier not in self.rarity_order:
+            raise ValueError(f"Unknown min_rarity_tier {min_tier!r} in {name} rules")
+        
+        return FeedRule(
+            name=name,
+            min_level=self.rarity_order[min_tier] if min_tier is not None else parent.min_level,
+            allow=setting('allow_achievements', 'allow', frozenset),
+            deny=setting('deny_achievements', 'deny', frozenset, frozenset()),
+            cooldown_seconds=setting('user_cooldown_minutes', 'cooldown_seconds', lambda minutes: float(minutes) * 60, 0.0),
+            platforms=setting('platforms', 'platforms', lambda platforms: tuple(platform.lower() for platform in platforms)),
+            message_template=setting('message_template', 'message_template', str)
+        )
+    
+    def rule_for(self, achievement: Dict) -> FeedRule:
+        feed_id = achievement.get('feed_id', achievement.get('_feed_id'))
+        return self.feeds.get(str(feed_id), self.default) if feed_id is not None else self.default
+    
+    def _cooling_down(self, rule: FeedRule, achievement: Dict, now: float) -> bool:
+        if not rule.cooldown_seconds:
+            return False
+        last_posted = self._last_posted.get((rule.name, achievement.get('user_handle')))
+        return last_posted is not None and now - last_posted < rule.cooldown_seconds
+    
+    def matches(self, rule: FeedRule, achievement: Dict) -> bool:
+        """Check rarity and allow/deny lists - constant time regardless of rule count"""
+        level = self.rarity_order.get(achievement.get('rarity_tier'))
+        if level is None or level < rule.min_level:
+            return False
+        name = achievement.get('achievement_name')
+        if rule.allow is not None and name not in rule.allow:
+            return False
+        return name not in rule.deny
+    
+    def evaluate(self, achievements: List[Dict], now: Optional[float] = None) -> List[tuple]:
+        """Single pass over a batch, returning (achievement, rule) for every match"""
+        now = time.time() if now is None else now
+        matched = []
+        claimed = set()  # Users already matched in this batch for rules with a cooldown
+        for achievement in achievements:
+            rule = self.rule_for(achievement)
+            if not self.matches(rule, achievement):
+                continue
+            if rule.cooldown_seconds:
+                user_key = (rule.name, achievement.get('user_handle'))
+                if user_key in claimed or self._cooling_down(rule, achievement, now):
+                    continue
+                claimed.add(user_key)
+            matched.append((achievement, rule))
+        return matched
+    
+    def in_cooldown(self, achievement: Dict, now: Optional[float] = None) -> bool:
+        return self._cooling_down(self.rule_for(achievement), achievement, time.time() if now is None else now)
+    
+    def note_posted(self, achievement: Dict, now: Optional[float] = None):
+        """Start the user's cooldown for the achievement's rule"""
+        rule = self.rule_for(achievement)
+        if rule.cooldown_seconds:
+            self._last_posted[(rule.name, achievement.get('user_handle'))] = time.time() if now is None else now
+
+class CarryOverQueue:
+    """Bounded priority queue of pending achievement IDs ranked by age-decayed rarity"""
+    
+    def __init__(self, max_size: int = 50000, half_life_hours: float = 6.0, max_age_hours: float = 24.0):
+        self.max_size = max_size
+        self.half_life_seconds = half_life_hours * 3600
+        self.max_age_seconds = max_age_hours * 3600
+        self._best: List[tuple] = []   # min-heap of (key, id) for top-K selection
+        self._worst: List[tuple] = []  # max-heap of (-key, id) for eviction
+        self._entries: Dict[int, tuple] = {}  # achievement ID -> (key, enqueued_at)
+    
+    def _key(self, rarity_percentage: Optional[float], enqueued_at: float) -> float:
+        # Effective rarity doubles every half-life: log2(pct) + age / half_life. The
+        # shared "now" term doesn't change the order, so the key never needs updating.
+        percentage = 100.0 if rarity_percentage is None else max(rarity_percentage, 1e-6)
+        return math.log2(percentage) - enqueued_at / self.half_life_seconds
+    
+    def _is_live(self, key: float, achievement_id: int) -> bool:
+        entry = self._entries.get(achievement_id)
+        return entry is not None and entry[0] == key
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def push(self, achievement_id: int, rarity_percentage: Optional[float], enqueued_at: float) -> List[int]:
+        """Queue an achievement in O(log n), returning any IDs evicted to stay within max_size"""
+        if achievement_id in self._entries:
+            return []
+        key = self._key(rarity_percentage, enqueued_at)
+        self._entries[achievement_id] = (key, enqueued_at)
+        heapq.heappush(self._best, (key, achievement_id))
+        heapq.heappush(self._worst, (-key, achievement_id))
+        
+        evicted = []
+        while len(self._entries) > self.max_size:
+            negative_key, worst_id = heapq.heappop(self._worst)
+            if self._is_live(-negative_key, worst_id):
+                del self._entries[worst_id]
+                evicted.append(worst_id)
+        
+        # Lazily deleted slots pile up in both heaps, compact them occasionally
+        if len(self._best) + len(self._worst) > 4 * len(self._entries) + 64:
+            self._best = [(key, achievement_id) for achievement_id, (key, _) in self._entries.items()]
+            self._worst = [(-key, achievement_id) for key, achievement_id in self._best]
+            heapq.heapify(self._best)
+            heapq.heapify(self._worst)
+        return evicted
+    
+    def pop_best(self, count: int, now: Optional[float] = None) -> tuple:
+        """Pop up to count of the best live entries in O(count log n), returning (selected, expired) ID lists"""
+        now = time.time() if now is None else now
+        selected, expired = [], []
+        while self._best and len(selected) < count:
+            key, achievement_id = heapq.heappop(self._best)
+            if not self._is_live(key, achievement_id):
+                continue  # Evicted or popped since this slot was pushed
+            _, enqueued_at = self._entries.pop(achievement_id)
+            if now - enqueued_at > self.max_age_seconds:
+                expired.append(achievement_id)
+            else:
+                selected.append(achievement_id)
+        return selected, expired
+
+class SeenIndex:
+    """Persistent duplicate index: two rotating Bloom filter generations in a memory-mapped file plus an exact LRU"""
+    
+    MAGIC = b'FMSEEN01'
+    HEADER = struct.Struct('<8sQIIQQ')  # magic, bits per generation, hash count, current generation, counts
+    
+    def __init__(self, path: str, memory_bytes: int = 262144, fp_rate: float = 0.001, lru_size: int = 4096):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        # Size each generation from the memory budget and target false-positive rate
+        self.generation_bytes = max(64, memory_bytes // 2)
+        self.bits = self.generation_bytes * 8
+        self.capacity = max(1, int(self.bits * math.log(2) ** 2 / -math.log(fp_rate)))
+        self.hash_count = max(1, round(self.bits / self.capacity * math.log(2)))
+        self.lru_size = lru_size
+        self._lru: OrderedDict = OrderedDict()
+        
+        size = self.HEADER.size + 2 * self.generation_bytes
+        fresh = not os.path.exists(path) or os.path.getsize(path) != size
+        self._file = open(path, 'r+b' if not fresh else 'w+b')
+        if fresh:
+            self._file.truncate(size)
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+        
+        magic, bits, hash_count, current, *counts = self.HEADER.unpack_from(self._mmap, 0)
+        if fresh or magic != self.MAGIC or bits != self.bits or hash_count != self.hash_count:
+            self._mmap[:] = bytes(size)
+            current, counts = 0, [0, 0]
+        self.current = current
+        self.counts = counts
+        self._write_header()
+    
+    def _write_header(self):
+        self.HEADER.pack_into(self._mmap, 0, self.MAGIC, self.bits, self.hash_count, self.current, *self.counts)
+    
+    def _positions(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first, second = struct.unpack('<QQ', digest)
+        return [(first + i * second) % self.bits for i in range(self.hash_count)]
+    
+    def _generation_has(self, generation: int, positions: List[int]) -> bool:
+        offset = self.HEADER.size + generation * self.generation_bytes
+        return all(self._mmap[offset + position // 8] & (1 << (position % 8)) for position in positions)
+    
+    def __contains__(self, key: str) -> bool:
+        if key in self._lru:
+            self._lru.move_to_end(key)
+            return True
+        positions = self._positions(key)
+        return self._generation_has(self.current, positions) or self._generation_has(1 - self.current, positions)
+    
+    def add(self, key: str):
+        """Remember a key, rotating to a fresh generation when the current one is full"""
+        self._lru[key] = True
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+        
+        positions = self._positions(key)
+        if self._generation_has(self.current, positions):
+            return
+        if self.counts[self.current] >= self.capacity:
+            self._rotate()
+        offset = self.HEADER.size + self.current * self.generation_bytes
+        for position in positions:
+            self._mmap[offset + position // 8] |= 1 << (position % 8)
+        self.counts[self.current] += 1
+        self._write_header()
+    
+    def _rotate(self):
+        """Drop the oldest generation and start filling it again"""
+        self.current = 1 - self.current
+        offset = self.HEADER.size + self.current * self.generation_bytes
+        self._mmap[offset:offset + self.generation_bytes] = bytes(self.generation_bytes)
+        self.counts[self.current] = 0
+        logger.info(f"Seen index rotated to generation {self.current}")
+    
+    def flush(self):
+        self._mmap.flush()
+    
+    def close(self):
+        self._mmap.flush()
+        self._mmap.close()
+        self._file.close()
+
+class DeliveryJob:
+    """An achievement moving through the delivery pipeline"""
+    
+    __slots__ = ('achievement', 'fetched_at', 'platforms', 'message', 'share_url',
+                 'card_data', 'image_blob', 'reused_blob', 'embed', 'acquired', 'deferred', 'sink_data', 'digest')
+    
+    def __init__(self, achievement: Dict, fetched_at: Optional[float], platforms: List[str]):
+        self.achievement = achievement
+        self.fetched_at = fetched_at
+        self.platforms = platforms
+        self.message = None
+        self.share_url = None
+        self.card_data = None
+        self.image_blob = None
+        self.reused_blob = False
+        self.embed = None
+        self.acquired = []
+        self.deferred = False
+        self.sink_data = {}
+        self.digest: Optional[List[Dict]] = None
+
+class PipelineStage:
+    """Workers for one pipeline stage, fed by a bounded queue"""
+    
+    def __init__(self, name: str, handler, workers: int, queue_size: int):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.queue_size = queue_size
+        self.queue: Optional[asyncio.Queue] = None
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.max_seconds = 0.0
+        self.max_depth = 0
+    
+    def stats(self) -> Dict:
+        return {
+            'workers': self.workers,
+            'processed': self.processed,
+            'failed': self.failed,
+            'avg_ms': self.busy_seconds * 1000 / self.processed if self.processed else 0.0,
+            'max_ms': self.max_seconds * 1000,
+            'depth': self.queue.qsize() if self.queue else 0,
+            'max_depth': self.max_depth,
+        }
+
+class Pipeline:
+    """Stages connected by bounded queues, so consecutive items overlap across stages with backpressure"""
+    
+    def __init__(self, stages: List[PipelineStage], on_error=None, metrics: Optional[MetricsRegistry] = None):
+        self.stages = stages
+        self.on_error = on_error
+        self.metrics = metrics
+    
+    async def run(self, items):
+        """Push items through every stage and return once all of them have left the pipeline"""
+        for stage in self.stages:
+            stage.queue = asyncio.Queue(maxsize=stage.queue_size)
+        workers = [
+            asyncio.create_task(self._work(stage, next_stage))
+            for stage, next_stage in zip(self.stages, self.stages[1:] + [None])
+            for _ in range(stage.workers)
+        ]
+        try:
+            for item in items:
+                await self._put(self.stages[0], item)
+            for stage in self.stages:
+                await stage.queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+    
+    async def _put(self, stage: PipelineStage, item):
+        # Blocks while the stage is full, holding back the stage before it
+        await stage.queue.put(item)
+        stage.max_depth = max(stage.max_depth, stage.queue.qsize())
+    
+    async def _work(self, stage: PipelineStage, next_stage: Optional[PipelineStage]):
+        while True:
+            item = await stage.queue.get()
+            try:
+                start = time.monotonic()
+                try:
+                    result = await stage.handler(item)
+                except Exception as e:
+                    logger.error(f"Pipeline stage {stage.name} failed: {e}")
+                    stage.failed += 1
+                    if self.on_error:
+                        self.on_error(item, stage.name)
+                    continue
+                elapsed = time.monotonic() - start
+                stage.processed += 1
+                stage.busy_seconds += elapsed
+                stage.max_seconds = max(stage.max_seconds, elapsed)
+                if self.metrics:
+                    self.metrics.observe('feedmaster_stage_seconds', elapsed, stage=stage.name)
+                if result is not None and next_stage is not None:
+                    await self._put(next_stage, result)
+            finally:
+                stage.queue.task_done()
+
+class PublisherSink:
+    """A destination for achievement posts with its own bounded queue, workers and retry policy
+    
+    Subclasses implement publish(). prepare() runs in the pipeline's upload stage, before the
+    job is queued, for work such as media uploads that retries should not repeat.
+    """
+    
+    needs_card = False
+    
+    def __init__(self, name: str, bot, workers: int = 1, queue_size: int = 50, max_attempts: int = 3,
+                 retry_seconds: float = 5.0, max_posts_per_hour: Optional[float] = None):
+        if not re.fullmatch(r'[a-z0-9_-]+', name):
+            raise ValueError(f"Sink name must be lowercase letters, digits, - or _, got {name!r}")
+        if workers < 1 or queue_size < 1 or max_attempts < 1:
+            raise ValueError(f"Sink {name}: workers, queue_size and max_attempts must be at least 1")
+        if max_posts_per_hour is not None and max_posts_per_hour <= 0:
+            raise ValueError(f"Sink {name}: max_posts_per_hour must be positive, got {max_posts_per_hour}")
+        self.name = name
+        self.bot = bot
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.max_posts_per_hour = max_posts_per_hour
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.published = 0
+        self.failed = 0
+        self.retries = 0
+        self.backlogged = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return True
+    
+    @property
+    def rate_limit_key(self) -> str:
+        """Post budget key, one per destination account"""
+        return f"sink:{self.name}"
+    
+    async def prepare(self, job: DeliveryJob):
+        pass
+    
+    async def is_published(self, job: DeliveryJob) -> bool:
+        """Whether an earlier attempt already published the job, checked before its card is rendered"""
+        return False
+    
+    async def publish(self, job: DeliveryJob) -> bool:
+        raise NotImplementedError
+    
+    def submit(self, job: DeliveryJob) -> Optional[asyncio.Future]:
+        """Queue a job for this sink's workers, returning a future for the outcome or None when the queue is full"""
+        if not self._tasks:
+            self._queue = asyncio.Queue(self.queue_size)
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((job, future))
+        except asyncio.QueueFull:
+            self.backlogged += 1
+            return None
+        return future
+    
+    async def _work(self):
+        while True:
+            job, future = await self._queue.get()
+            success = False
+            try:
+                success = await self._attempt(job)
+            finally:
+                self._queue.task_done()
+                if not future.done():
+                    future.set_result(success)
+    
+    async def _attempt(self, job: DeliveryJob) -> bool:
+        for attempt in range(self.max_attempts):
+            if attempt:
+                self.retries += 1
+                await asyncio.sleep(self.retry_seconds * 2 ** (attempt - 1))
+            try:
+                with self.bot.metrics.timer('feedmaster_post_seconds', sink=self.name):
+                    success = await self.publish(job)
+                if success:
+                    self.published += 1
+                    self.bot.metrics.inc('feedmaster_posts_total', sink=self.name, result='published')
+                    return True
+            except Exception as e:
+                logger.error(f"Failed to post to {self.name}: {e}")
+        self.failed += 1
+        self.bot.metrics.inc('feedmaster_posts_total', sink=self.name, result='failed')
+        return False
+    
+    def stats(self) -> Dict:
+        return {
+            'published': self.published,
+            'failed': self.failed,
+            'retries': self.retries,
+            'backlogged': self.backlogged,
+            'queued': self._queue.qsize() if self._queue else 0,
+        }
+    
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while self._queue and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_result(False)
+
+class BlueskySink(PublisherSink):
+    """Posts through the bot's Bluesky session with the achievement card as a link card"""
+    
+    needs_card = True
+    
+    def __init__(self, name: str, bot, spacing_seconds: float = 2.0, **options):
+        super().__init__(name, bot, **options)
+        self.spacing_seconds = spacing_seconds
+    
+    @property
+    def enabled(self) -> bool:
+        return self.bot.bluesky_client is not None
+    
+    @property
+    def rate_limit_key(self) -> str:
+        return f"bluesky:{self.bot.bluesky_username or self.bot.bluesky_did}"
+    
+    async def prepare(self, job: DeliveryJob):
+        await self.bot._prepare_bluesky(job)
+    
+    async def is_published(self, job: DeliveryJob) -> bool:
+        try:
+            return await self.bot._bluesky_post_exists(achievement_rkey(job.achievement))
+        except Exception as e:
+            logger.warning(f"Failed to check for an existing Bluesky post: {e}")
+            return False
+    
+    async def publish(self, job: DeliveryJob) -> bool:
+        success = await self.bot._publish_bluesky(job)
+        if success:
+            # Space out consecutive Bluesky posts
+            await asyncio.sleep(self.spacing_seconds)
+        return success
+
+class DiscordSink(PublisherSink):
+    """Posts embeds to a Discord webhook, several achievements per message"""
+    
+    def __init__(self, name: str, bot, webhook_url: str, batch_seconds: float = 2.0,
+                 workers: int = DiscordPublisher.MAX_EMBEDS, max_attempts: int = 2, **options):
+        # One worker per embed slot, so concurrent jobs can share a webhook message
+        super().__init__(name, bot, workers=workers, max_attempts=max_attempts, **options)
+        self.publisher = DiscordPublisher(bot.http, webhook_url, batch_seconds=batch_seconds)
+    
+    @property
+    def rate_limit_key(self) -> str:
+        # Keyed by a hash so the webhook token never lands in the database
+        return f"discord:{hashlib.sha256(self.publisher.webhook_url.encode()).hexdigest()[:12]}"
+    
+    async def publish(self, job: DeliveryJob) -> bool:
+        return await self.publisher.send(self.bot._discord_embed(job.message, job.achievement))
+    
+    async def close(self):
+        await super().close()
+        await self.publisher.close()
+
+class WebhookSink(PublisherSink):
+    """POSTs the achievement and formatted message as JSON to any URL"""
+    
+    def __init__(self, name: str, bot, url: str, headers: Optional[Dict[str, str]] = None, **options):
+        super().__init__(name, bot, **options)
+        self.url = url
+        self.headers = headers or {}
+    
+    async def publish(self, job: DeliveryJob) -> bool:
+        achievement = {key: value for key, value in job.achievement.items() if not key.startswith('_')}
+        response = await self.bot.http.post(self.url, headers=self.headers, json={
+            'achievement': achievement,
+            'message': job.message,
+            'share_url': job.share_url,
+        })
+        if not response.is_success:
+            logger.warning(f"Webhook {self.name} returned {response.status_code}")
+        return response.is_success
+
+class SlackSink(PublisherSink):
+    """Posts to a Slack incoming webhook"""
+    
+    def __init__(self, name: str, bot, webhook_url: str, **options):
+        super().__init__(name, bot, **options)
+        self.webhook_url = webhook_url
+    
+    @staticmethod
+    def _escape(text: str) -> str:
+        return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    
+    async def publish(self, job: DeliveryJob) -> bool:
+        achievement = job.achievement
+        text = self._escape(job.message)
+        if job.share_url:
+            text += f"\n<{job.share_url}|{self._escape(achievement.get('achievement_name', 'View achievement'))}>"
+        section = {'type': 'section', 'text': {'type': 'mrkdwn', 'text': text}}
+        if achievement.get('user_avatar_url'):
+            section['accessory'] = {'type': 'image', 'image_url': achievement['user_avatar_url'],
+                                    'alt_text': achievement.get('user_handle', 'avatar')}
+        response = await self.bot.http.post(self.webhook_url, json={'text': job.message, 'blocks': [section]})
+        if not response.is_success:
+            logger.warning(f"Slack {self.name} returned {response.status_code}: {response.text[:200]}")
+        return response.is_success
+
+class MastodonSink(PublisherSink):
+    """Posts statuses to a Mastodon account, with the achievement card attached"""
+    
+    MAX_CHARACTERS = 500
+    
+    def __init__(self, name: str, bot, base_url: str, access_token: str, visibility: str = 'public',
+                 attach_card: bool = True, **options):
+        super().__init__(name, bot, **options)
+        self.base_url = base_url.rstrip('/')
+        self.headers = {'Authorization': f"Bearer {access_token}"}
+        self.visibility = visibility
+        self.needs_card = attach_card
+    
+    @property
+    def rate_limit_key(self) -> str:
+        return f"mastodon:{urlparse(self.base_url).netloc}:{self.name}"
+    
+    async def prepare(self, job: DeliveryJob):
+        """Upload the card as a media attachment"""
+        if not (self.needs_card and job.card_data):
+            return
+        mime_type = CARD_FORMATS[self.bot.card_format][1]
+        try:
+            response = await self.bot.http.post(
+                f"{self.base_url}/api/v2/media", headers=self.headers,
+                files={'file': (f"achievement.{mime_type.split('/')[1]}", job.card_data, mime_type)},
+                data={'description': f"{job.achievement.get('achievement_name', 'Achievement')} achievement card"}
+            )
+            response.raise_for_status()
+            job.sink_data[self.name] = response.json()['id']
+        except Exception as e:
+            logger.error(f"Failed to upload achievement card to {self.name}: {e}")
+    
+    async def publish(self, job: DeliveryJob) -> bool:
+        suffix = f"\n\n{job.share_url}" if job.share_url else ''
+        status = job.message[:self.MAX_CHARACTERS - len(suffix)] + suffix
+        media_id = job.sink_data.get(self.name)
+        # Mastodon returns the original status for a repeated Idempotency-Key, so retries can't double post
+        response = await self.bot.http.post(
+            f"{self.base_url}/api/v1/statuses",
+            headers={**self.headers, 'Idempotency-Key': f"feedmaster-achievement-{job.achievement['id']}"},
+            json={'status': status, 'visibility': self.visibility, 'media_ids': [media_id] if media_id else []}
+        )
+        if not response.is_success:
+            logger.warning(f"Mastodon {self.name} returned {response.status_code}: {response.text[:200]}")
+        return response.is_success
+
+SINK_TYPES = {
+    'bluesky': BlueskySink,
+    'discord': DiscordSink,
+    'webhook': WebhookSink,
+    'slack': SlackSink,
+    'mastodon': MastodonSink,
+}
+
+def create_sink(name: str, bot, options: Dict) -> PublisherSink:
+    """Build a sink from its PUBLISHER_SINKS entry, whose type defaults to the sink name"""
+    options = dict(options)
+    sink_type = options.pop('type', name)
+    if sink_type not in SINK_TYPES:
+        raise ValueError(f"Sink {name}: unknown type {sink_type}, expected one of {', '.join(SINK_TYPES)}")
+    try:
+        return SINK_TYPES[sink_type](name, bot, **options)
+    except TypeError as e:
+        raise ValueError(f"Sink {name}: invalid options ({e})") from e
+
 class FeedmasterBlueskyBot:
     def __init__(self):
         # Load configuration from environment
@@ -39,42 +2040,279 @@ class FeedmasterBlueskyBot:
         self.bluesky_username = os.getenv('BLUESKY_USERNAME')
         self.bluesky_did = os.getenv('BLUESKY_DID')  # Optional DID fallback
         self.bluesky_app_password = os.getenv('BLUESKY_APP_PASSWORD')
+        self.bluesky_max_concurrency = int(os.getenv('BLUESKY_MAX_CONCURRENCY', '4'))
+        self.bluesky_session_path = os.getenv('BLUESKY_SESSION_PATH', 'data/bluesky_session')
+        self.bluesky_refresh_margin_minutes = float(os.getenv('BLUESKY_REFRESH_MARGIN_MINUTES', '20'))
         self.discord_webhook_url = os.getenv('DISCORD_WEBHOOK_URL')  # Optional Discord webhook
+        self.discord_batch_seconds = float(os.getenv('DISCORD_BATCH_SECONDS', '2'))
         self.min_rarity_tier = os.getenv('MIN_RARITY_TIER', 'Bronze')
         self.poll_interval_minutes = int(os.getenv('POLL_INTERVAL_MINUTES', '10'))
         self.max_posts_per_hour = int(os.getenv('MAX_POSTS_PER_HOUR', '30'))
         
+        # Adaptive polling bounds
+        self.adaptive_polling = os.getenv('ADAPTIVE_POLLING', 'false').lower() == 'true'
+        self.poll_min_interval_minutes = float(os.getenv('POLL_MIN_INTERVAL_MINUTES', '10'))
+        self.poll_max_interval_minutes = float(os.getenv('POLL_MAX_INTERVAL_MINUTES', '30'))
+        self.poll_jitter = float(os.getenv('POLL_JITTER', '0.1'))
+        
+        # Fetch pagination settings
+        self.fetch_page_size = int(os.getenv('FETCH_PAGE_SIZE', '50'))
+        self.fetch_max_pages = int(os.getenv('FETCH_MAX_PAGES', '10'))
+        # Cold start: 'head' skips history, 'lookback' replays the last N ids, 'replay' starts from 0
+        self.cold_start_mode = os.getenv('COLD_START_MODE', 'head').lower()
+        self.cold_start_lookback = int(os.getenv('COLD_START_LOOKBACK', '200'))
+        # Fetch mode: 'combined' queries all feeds at once, 'per_feed' queries each feed concurrently
+        self.fetch_mode = os.getenv('FETCH_MODE', 'combined').lower()
+        self.fetch_concurrency = int(os.getenv('FETCH_CONCURRENCY', '4'))
+        
+        # Ingest mode: 'poll' only, or 'stream' with polling as fallback
+        self.ingest_mode = os.getenv('INGEST_MODE', 'poll').lower()
+        self.stream_url = os.getenv('STREAM_URL') or f"{self.feedmaster_api_url}/api/v1/achievements/stream"
+        self.stream_batch_seconds = float(os.getenv('STREAM_BATCH_SECONDS', '5'))
+        self.stream_read_timeout = float(os.getenv('STREAM_READ_TIMEOUT_SECONDS', '90'))
+        self.stream_max_failures = int(os.getenv('STREAM_MAX_FAILURES', '3'))
+        self.stream_retry_minutes = int(os.getenv('STREAM_RETRY_MINUTES', str(self.poll_interval_minutes)))
+        self._stream_retry_at = 0.0
+        
+        # Card rendering workers
+        self.card_render_executor = os.getenv('CARD_RENDER_EXECUTOR', 'process').lower()
+        self.card_render_workers = int(os.getenv('CARD_RENDER_WORKERS', str(min(4, os.cpu_count() or 1))))
+        
+        self.card_format = os.getenv('CARD_FORMAT', 'png').lower()
+        self.card_quality = int(os.getenv('CARD_QUALITY', '85'))
+        self.card_max_bytes = int(os.getenv('CARD_MAX_BYTES', '950000'))
+        
+        self.blob_reuse_window_hours = float(os.getenv('BLOB_REUSE_WINDOW_HOURS', '24'))
+        
+        # Card cache
+        self.card_cache_dir = os.getenv('CARD_CACHE_DIR', '/tmp/achievement_cards')
+        self.card_cache_memory_mb = float(os.getenv('CARD_CACHE_MEMORY_MB', '16'))
+        self.card_cache_max_mb = float(os.getenv('CARD_CACHE_MAX_MB', '200'))
+        self.card_cache_max_age_days = float(os.getenv('CARD_CACHE_MAX_AGE_DAYS', '7'))
+        
+        # Avatar cache
+        self.avatar_cache_memory_mb = float(os.getenv('AVATAR_CACHE_MEMORY_MB', '16'))
+        self.avatar_cache_ttl_minutes = float(os.getenv('AVATAR_CACHE_TTL_MINUTES', '60'))
+        
+        # Link card metadata
+        self.link_metadata_ttl_minutes = float(os.getenv('LINK_METADATA_TTL_MINUTES', '60'))
+        self.link_metadata_max_kb = int(os.getenv('LINK_METADATA_MAX_KB', '64'))
+        
+        # Delivery pipeline
+        self.pipeline_queue_size = int(os.getenv('PIPELINE_QUEUE_SIZE', '8'))
+        self.render_stage_workers = int(os.getenv('RENDER_STAGE_WORKERS', str(self.card_render_workers)))
+        self.upload_stage_workers = int(os.getenv('UPLOAD_STAGE_WORKERS', '2'))
+        self.post_spacing_seconds = float(os.getenv('POST_SPACING_SECONDS', '2'))
+        # Digest posts summarizing the overflow beyond max posts per interval
+        self.digest_mode = os.getenv('DIGEST_MODE', 'false').lower() == 'true'
+        self.digest_threshold = int(os.getenv('DIGEST_THRESHOLD', '10'))
+        self.digest_max_items = int(os.getenv('DIGEST_MAX_ITEMS', '24'))
+        
+        # Extra publisher sinks (and overrides for the bluesky/discord ones) keyed by sink name
+        self.publisher_sinks = json.loads(os.getenv('PUBLISHER_SINKS', '') or '{}')
+        
+        # Durable state
+        self.state_db_path = os.getenv('STATE_DB_PATH', 'data/bot_state.db')
+        self.max_post_attempts = int(os.getenv('MAX_POST_ATTEMPTS', '3'))
+        self.outbox_retention_days = float(os.getenv('OUTBOX_RETENTION_DAYS', '7'))
+        self.queue_max_size = int(os.getenv('QUEUE_MAX_SIZE', '50000'))
+        self.queue_half_life_hours = float(os.getenv('QUEUE_HALF_LIFE_HOURS', '6'))
+        self.queue_max_age_hours = float(os.getenv('QUEUE_MAX_AGE_HOURS', '24'))
+        self.seen_index_path = os.getenv('SEEN_INDEX_PATH', 'data/seen_index.bin')
+        self.seen_index_memory_kb = int(os.getenv('SEEN_INDEX_MEMORY_KB', '256'))
+        self.seen_index_fp_rate = float(os.getenv('SEEN_INDEX_FP_RATE', '0.001'))
+        self.seen_index_lru_size = int(os.getenv('SEEN_INDEX_LRU_SIZE', '4096'))
+        
+        # Shared HTTP connection pool settings
+        self.http_max_connections_per_host = int(os.getenv('HTTP_MAX_CONNECTIONS_PER_HOST', '10'))
+        self.http_timeout = float(os.getenv('HTTP_TIMEOUT_SECONDS', '30'))
+        self.http_keepalive_seconds = float(os.getenv('HTTP_KEEPALIVE_SECONDS', '60'))
+        self.http2_enabled = os.getenv('HTTP2_ENABLED', 'false').lower() == 'true'
+        self.http_host_limits = json.loads(os.getenv('HTTP_HOST_LIMITS', '') or '{}')
+        
+        # Prometheus metrics endpoint (0 disables it)
+        self.metrics_host = os.getenv('METRICS_HOST') or '127.0.0.1'
+        self.metrics_port = int(os.getenv('METRICS_PORT', '9108'))
+        
         # Validation - enforce limits
         if self.poll_interval_minutes < 10:
             raise ValueError(f"POLL_INTERVAL_MINUTES must be at least 10 minutes, got {self.poll_interval_minutes}")
         if self.max_posts_per_hour > 60:
             raise ValueError(f"MAX_POSTS_PER_HOUR cannot exceed 60, got {self.max_posts_per_hour}")
+        if not 10 <= self.poll_min_interval_minutes <= self.poll_interval_minutes <= self.poll_max_interval_minutes:
+            raise ValueError(f"Poll intervals must satisfy 10 <= POLL_MIN_INTERVAL_MINUTES <= POLL_INTERVAL_MINUTES <= POLL_MAX_INTERVAL_MINUTES, "
+                             f"got {self.poll_min_interval_minutes}, {self.poll_interval_minutes}, {self.poll_max_interval_minutes}")
+        if not 0 <= self.poll_jitter < 1:
+            raise ValueError(f"POLL_JITTER must be between 0 and 1, got {self.poll_jitter}")
+        if not 1 <= self.fetch_page_size <= 500:
+            raise ValueError(f"FETCH_PAGE_SIZE must be between 1 and 500, got {self.fetch_page_size}")
+        if self.fetch_max_pages < 1:
+            raise ValueError(f"FETCH_MAX_PAGES must be at least 1, got {self.fetch_max_pages}")
+        if self.fetch_mode not in ('combined', 'per_feed'):
+            raise ValueError(f"FETCH_MODE must be combined or per_feed, got {self.fetch_mode}")
+        if self.fetch_concurrency < 1:
+            raise ValueError(f"FETCH_CONCURRENCY must be at least 1, got {self.fetch_concurrency}")
+        if self.ingest_mode not in ('poll', 'stream'):
+            raise ValueError(f"INGEST_MODE must be poll or stream, got {self.ingest_mode}")
+        if self.card_render_executor not in ('process', 'thread'):
+            raise ValueError(f"CARD_RENDER_EXECUTOR must be process or thread, got {self.card_render_executor}")
+        if self.card_format not in CARD_FORMATS:
+            raise ValueError(f"CARD_FORMAT must be one of {', '.join(CARD_FORMATS)}, got {self.card_format}")
+        if not 1 <= self.card_quality <= 100:
+            raise ValueError(f"CARD_QUALITY must be between 1 and 100, got {self.card_quality}")
+        if self.card_render_workers < 1:
+            raise ValueError(f"CARD_RENDER_WORKERS must be at least 1, got {self.card_render_workers}")
+        for name, value in (('PIPELINE_QUEUE_SIZE', self.pipeline_queue_size), ('RENDER_STAGE_WORKERS', self.render_stage_workers),
+                            ('UPLOAD_STAGE_WORKERS', self.upload_stage_workers)):
+            if value < 1:
+                raise ValueError(f"{name} must be at least 1, got {value}")
+        if self.digest_threshold < 1:
+            raise ValueError(f"DIGEST_THRESHOLD must be at least 1, got {self.digest_threshold}")
+        if not 2 <= self.digest_max_items <= 40:
+            raise ValueError(f"DIGEST_MAX_ITEMS must be between 2 and 40, got {self.digest_max_items}")
+        if self.queue_max_size < 1 or self.queue_half_life_hours <= 0 or self.queue_max_age_hours <= 0:
+            raise ValueError("QUEUE_MAX_SIZE, QUEUE_HALF_LIFE_HOURS and QUEUE_MAX_AGE_HOURS must be positive")
+        if not 0 < self.seen_index_fp_rate < 1:
+            raise ValueError(f"SEEN_INDEX_FP_RATE must be between 0 and 1, got {self.seen_index_fp_rate}")
+        if self.bluesky_refresh_margin_minutes < 15:
+            # atproto refreshes on its own once a call lands within 15 minutes of expiry, which would race ours
+            raise ValueError(f"BLUESKY_REFRESH_MARGIN_MINUTES must be at least 15, got {self.bluesky_refresh_margin_minutes}")
+        if self.http_max_connections_per_host < 1:
+            raise ValueError(f"HTTP_MAX_CONNECTIONS_PER_HOST must be at least 1, got {self.http_max_connections_per_host}")
+        if self.cold_start_mode not in ('head', 'lookback', 'replay'):
+            raise ValueError(f"COLD_START_MODE must be one of head, lookback, replay, got {self.cold_start_mode}")
         
         # Calculate posts per interval dynamically
         polls_per_hour = 60 / self.poll_interval_minutes
         self.max_posts_per_interval = max(1, int(self.max_posts_per_hour / polls_per_hour))
+        self.discord_max_posts_per_hour = float(os.getenv('DISCORD_MAX_POSTS_PER_HOUR', str(self.max_posts_per_hour)))
+        self.rate_limit_burst = float(os.getenv('RATE_LIMIT_BURST', str(self.max_posts_per_interval)))
+        if self.discord_max_posts_per_hour <= 0:
+            raise ValueError(f"DISCORD_MAX_POSTS_PER_HOUR must be positive, got {self.discord_max_posts_per_hour}")
+        if self.rate_limit_burst < 1:
+            raise ValueError(f"RATE_LIMIT_BURST must be at least 1, got {self.rate_limit_burst}")
         self.message_template = os.getenv(
             'MESSAGE_TEMPLATE',
             '🎉 Congratulations {display_name} on earning "{achievement}"! Only {percentage}% of users have achieved this {rarity} rarity!'
         )
+        self.rules_file = os.getenv('RULES_FILE')
         
         # Validate configuration
-        if not self.discord_webhook_url and ((not self.bluesky_username and not self.bluesky_did) or not self.bluesky_app_password):
-            raise ValueError("Either DISCORD_WEBHOOK_URL or (BLUESKY_USERNAME/BLUESKY_DID + BLUESKY_APP_PASSWORD) is required")
+        if not isinstance(self.publisher_sinks, dict):
+            raise ValueError("PUBLISHER_SINKS must be a JSON object mapping sink names to their settings")
+        if not self.discord_webhook_url and not self.publisher_sinks and ((not self.bluesky_username and not self.bluesky_did) or not self.bluesky_app_password):
+            raise ValueError("Either DISCORD_WEBHOOK_URL, PUBLISHER_SINKS or (BLUESKY_USERNAME/BLUESKY_DID + BLUESKY_APP_PASSWORD) is required")
         
         if not self.feed_ids or self.feed_ids == ['']:
             raise ValueError("FEED_IDS is required")
         
         # Initialize Bluesky client
         self.bluesky_client = None
+        self._bluesky_semaphore = asyncio.Semaphore(max(1, self.bluesky_max_concurrency))
+        self._bluesky_session_expires_at = 0.0
+        self._bluesky_session_string = None
+        self._bluesky_did: Optional[str] = None  # From the session, client.me is cleared while a login runs
+        self._bluesky_host = 'bluesky'  # Metrics label, the session's PDS once logged in
+        self._session_task: Optional[asyncio.Task] = None
         
-        # Rate limiting
-        self.posts_this_hour = 0
-        self.hour_reset_time = datetime.now() + timedelta(hours=1)
+        # Poll scheduling and conditional request validators
+        self.scheduler = PollScheduler(
+            base_seconds=self.poll_interval_minutes * 60,
+            min_seconds=self.poll_min_interval_minutes * 60,
+            max_seconds=self.poll_max_interval_minutes * 60,
+            adaptive=self.adaptive_polling,
+            jitter=self.poll_jitter
+        )
+        self._validators: OrderedDict = OrderedDict()
+        self._last_fetch_count = 0
+        self._backlog_pending = False
+        self._fetch_failed = False
+        
+        # In-process metrics, scraped from the metrics endpoint
+        self.metrics = MetricsRegistry()
+        self._register_metrics()
+        self._metrics_server: Optional[MetricsServer] = None
+        
+        # Shared HTTP client for Feedmaster, Discord, avatars and link metadata
+        if self.http2_enabled and not HTTP2_AVAILABLE:
+            logger.warning("HTTP2_ENABLED is set but the h2 package is not installed, using HTTP/1.1")
+        self.http = HttpClientPool(
+            max_connections_per_host=self.http_max_connections_per_host,
+            timeout=self.http_timeout,
+            keepalive_expiry=self.http_keepalive_seconds,
+            http2=self.http2_enabled and HTTP2_AVAILABLE,
+            host_limits=self.http_host_limits,
+            metrics=self.metrics
+        )
+        
+        # Publisher sinks, each with its own queue and workers so a slow one can't stall the rest
+        sink_configs = {}
+        if self.bluesky_username or self.bluesky_did:
+            sink_configs['bluesky'] = {'max_posts_per_hour': self.max_posts_per_hour, 'spacing_seconds': self.post_spacing_seconds}
+        if self.discord_webhook_url:
+            sink_configs['discord'] = {'webhook_url': self.discord_webhook_url, 'batch_seconds': self.discord_batch_seconds,
+                                       'max_posts_per_hour': self.discord_max_posts_per_hour}
+        for name, options in self.publisher_sinks.items():
+            sink_configs[name] = {**sink_configs.get(name, {}), **options}
+        self.sinks: Dict[str, PublisherSink] = {name: create_sink(name, self, options) for name, options in sink_configs.items()}
+        
+        # Durable outbox holding cursors and per-platform delivery state
+        self.outbox = AchievementOutbox(self.state_db_path, max_attempts=self.max_post_attempts)
         
-        # Track cursor for processed achievements
-        self.cursor_file = '/tmp/achievement_cursor.txt'
-        self.last_processed_id = self._load_cursor()
+        # Post budgets per platform and account, carried across restarts
+        self.rate_limiter = RateLimiter()
+        self._rate_limit_keys = {}
+        for name, sink in self.sinks.items():
+            if sink.max_posts_per_hour:
+                self._rate_limit_keys[name] = sink.rate_limit_key
+                self.rate_limiter.configure(sink.rate_limit_key, self.rate_limit_burst, sink.max_posts_per_hour)
+        self.rate_limiter.restore(self.outbox.get_rate_limits())
+        self._migrate_legacy_cursors()
+        cursors = self.outbox.get_cursors()
+        self.last_processed_id = cursors.get('global')
+        
+        # Per-feed cursors used in per_feed fetch mode
+        self.feed_cursors = {name[len('feed:'):]: value for name, value in cursors.items() if name.startswith('feed:')}
+        self._pending_feed_cursors: Dict[str, int] = {}
+        self._next_purge_at = 0.0
+        
+        # Pending achievements carried across intervals, rebuilt from the outbox on startup
+        self.queue = CarryOverQueue(
+            max_size=self.queue_max_size,
+            half_life_hours=self.queue_half_life_hours,
+            max_age_hours=self.queue_max_age_hours
+        )
+        self._queue_loaded = False
+        
+        # Duplicate suppression across restarts and cursor rollbacks
+        self.seen_index = SeenIndex(
+            self.seen_index_path,
+            memory_bytes=self.seen_index_memory_kb * 1024,
+            fp_rate=self.seen_index_fp_rate,
+            lru_size=self.seen_index_lru_size
+        )
+        for achievement in self.outbox.recently_posted(self.seen_index_lru_size // 2):
+            self._remember_posted(achievement)
+        
+        # Avatars for card rendering, revalidated with the avatar host once stale
+        self.avatar_cache = AvatarCache(
+            self.http,
+            size=CardTemplate.AVATAR_SIZE,
+            memory_bytes=int(self.avatar_cache_memory_mb * 1024 * 1024),
+            ttl_seconds=self.avatar_cache_ttl_minutes * 60
+        )
+        
+        # Share page metadata and uploaded og:image blobs, by URL
+        self.link_metadata_cache = TTLCache(1024, self.link_metadata_ttl_minutes * 60)
+        self.link_image_cache = TTLCache(1024, self.link_metadata_ttl_minutes * 60)
+        
+        # Rendered cards, shared by retries and repeat awards
+        self.card_cache = CardCache(
+            self.card_cache_dir,
+            memory_bytes=int(self.card_cache_memory_mb * 1024 * 1024),
+            max_bytes=int(self.card_cache_max_mb * 1024 * 1024),
+            max_age_seconds=self.card_cache_max_age_days * 86400
+        )
         
         # Rarity tier ordering for filtering
         self.rarity_order = {
@@ -87,99 +2325,562 @@ class FeedmasterBlueskyBot:
             'Mythic': 6
         }
         
-        logger.info(f"Bot initialized for feeds: {self.feed_ids}")
-        logger.info(f"Minimum rarity: {self.min_rarity_tier}")
-        logger.info(f"Poll interval: {self.poll_interval_minutes} minutes")
-        logger.info(f"Max posts per hour: {self.max_posts_per_hour}")
-        logger.info(f"Max posts per interval: {self.max_posts_per_interval}")
-        logger.info(f"Starting from achievement ID: {self.last_processed_id}")
+        # Per-feed filtering and routing rules, compiled once
+        if self.min_rarity_tier not in self.rarity_order:
+            raise ValueError(f"MIN_RARITY_TIER must be one of {', '.join(self.rarity_order)}, got {self.min_rarity_tier}")
+        self.rules = RoutingRules.from_file(self.rules_file, self.rarity_order, self.min_rarity_tier)
+        
+        logger.info(f"Bot initialized for feeds: {self.feed_ids}")
+        logger.info(f"Minimum rarity: {self.min_rarity_tier}")
+        if self.rules_file:
+            logger.info(f"Loaded routing rules from {self.rules_file} for feeds: {', '.join(self.rules.feeds) or 'none'}")
+        logger.info(f"Poll interval: {self.poll_interval_minutes} minutes" + (
+            f" (adaptive {self.poll_min_interval_minutes:g}-{self.poll_max_interval_minutes:g} minutes)" if self.adaptive_polling else ''))
+        logger.info(f"Max posts per hour: {self.max_posts_per_hour}")
+        logger.info(f"Max posts per interval: {self.max_posts_per_interval}")
+        logger.info(f"Rate limits: bursts of {self.rate_limit_burst:g}, Discord {self.discord_max_posts_per_hour:g} posts/hour")
+        logger.info(f"Seen index: {self.seen_index_memory_kb} KB, ~{self.seen_index.capacity} achievements per generation at {self.seen_index_fp_rate} false-positive rate")
+        logger.info(f"Carry-over queue: up to {self.queue_max_size} achievements, rarity half-life {self.queue_half_life_hours:g}h, expiry {self.queue_max_age_hours:g}h")
+        logger.info(f"Card rendering: {self.card_render_workers} {self.card_render_executor} workers, "
+                    f"{self.card_format} up to {self.card_max_bytes} bytes")
+        logger.info(f"Card cache: {self.card_cache_dir} (template {self.card_cache.version}), {self.card_cache_memory_mb:g} MB memory, "
+                    f"{self.card_cache_max_mb:g} MB / {self.card_cache_max_age_days:g} days on disk")
+        logger.info(f"Fetch page size: {self.fetch_page_size} (max {self.fetch_max_pages} pages per poll)")
+        logger.info(f"Ingest mode: {self.ingest_mode}" + (f" ({self.stream_url})" if self.ingest_mode == 'stream' else ''))
+        logger.info(f"Fetch mode: {self.fetch_mode}" + (f" (concurrency {self.fetch_concurrency})" if self.fetch_mode == 'per_feed' else ''))
+        if self.fetch_mode == 'per_feed':
+            logger.info(f"Feed cursors: {self.feed_cursors}")
+        elif self.last_processed_id is None:
+            logger.info(f"No cursor found, cold start mode: {self.cold_start_mode}")
+        else:
+            logger.info(f"Starting from achievement ID: {self.last_processed_id}")
+        
+        # Initialize image generator
+        self.card_renderer = CardRenderer(
+            self.card_render_workers,
+            self.card_render_executor,
+            card_format=self.card_format,
+            max_bytes=self.card_max_bytes,
+            quality=self.card_quality
+        )
+        
+        # Delivery stages: card N+1 renders while card N uploads and card N-1 publishes
+        self.pipeline = Pipeline([
+            PipelineStage('filter', self._filter_stage, 1, self.pipeline_queue_size),
+            PipelineStage('render', self._render_stage, self.render_stage_workers, self.pipeline_queue_size),
+            PipelineStage('upload', self._upload_stage, self.upload_stage_workers, self.pipeline_queue_size),
+            PipelineStage('publish', self._publish_stage, 1, self.pipeline_queue_size),
+        ], on_error=self._requeue_job, metrics=self.metrics)
+        self._claimed_awards = set()
+        self._claimed_users = set()
+        self._posted_count = 0
+        self._deferred_count = 0
+        self._digested_count = 0
+        self._publishing = set()
+        if self.digest_mode:
+            logger.info(f"Digest mode: up to {self.digest_max_items} achievements per digest once {self.digest_threshold} are waiting")
+        logger.info(f"Delivery pipeline: {self.render_stage_workers} render, {self.upload_stage_workers} upload workers, "
+                    f"queues of {self.pipeline_queue_size}")
+        for name, sink in self.sinks.items():
+            logger.info(f"Sink {name} ({type(sink).__name__}): {sink.workers} workers, queue of {sink.queue_size}, "
+                        f"{sink.max_attempts} attempts" + (f", {sink.max_posts_per_hour:g} posts/hour" if sink.max_posts_per_hour else ''))
+    
+    def _register_metrics(self):
+        metrics = self.metrics
+        metrics.histogram('feedmaster_fetch_seconds', 'Feedmaster achievement page fetch latency')
+        metrics.histogram('feedmaster_stage_seconds', 'Delivery pipeline stage latency per achievement')
+        metrics.histogram('feedmaster_post_seconds', 'Publish latency per sink and attempt')
+        metrics.counter('feedmaster_achievements_total', 'Achievements by feed and outcome (fetched, eligible, posted, digested or why they were dropped)')
+        metrics.counter('feedmaster_posts_total', 'Sink deliveries by result after retries')
+        metrics.counter('feedmaster_http_errors_total', 'HTTP error responses and transport failures by host and status')
+        metrics.gauge('feedmaster_rate_limit_tokens', 'Posts left in each sink\'s rate limit budget')
+        metrics.gauge('feedmaster_rate_limit_wait_seconds', 'Seconds until each sink\'s budget allows another post')
+        metrics.counter('feedmaster_cache_lookups_total', 'Card, avatar and link metadata cache lookups by result')
+        metrics.gauge('feedmaster_cache_hit_ratio', 'Share of cache lookups served without rendering or downloading')
+        metrics.gauge('feedmaster_queue_depth', 'Achievements waiting in the carry-over queue')
+        metrics.gauge('feedmaster_sink_queue_depth', 'Jobs waiting in each sink\'s queue')
+        metrics.gauge('feedmaster_outbox_deliveries', 'Outbox delivery rows by state')
+        metrics.add_collector(self._collect_metrics)
+    
+    def _collect_metrics(self):
+        """Refresh the point-in-time gauges for a scrape"""
+        metrics = self.metrics
+        for name, key in self._rate_limit_keys.items():
+            metrics.set('feedmaster_rate_limit_tokens', self.rate_limiter.remaining(key), sink=name)
+            metrics.set('feedmaster_rate_limit_wait_seconds', self.rate_limiter.wait_time(key), sink=name)
+        card, avatar, link = self.card_cache.stats(), self.avatar_cache.stats(), self.link_metadata_cache.stats()
+        lookups = {
+            'card': {'hit': card['hits_memory'] + card['hits_disk'], 'miss': card['misses']},
+            'avatar': {'hit': avatar['hits'], 'revalidated': avatar['revalidated'], 'miss': avatar['downloads']},
+            'link_metadata': {'hit': link['hits'], 'miss': link['misses']},
+        }
+        for cache, results in lookups.items():
+            for result, count in results.items():
+                metrics.set('feedmaster_cache_lookups_total', count, cache=cache, result=result)
+            total = sum(results.values())
+            metrics.set('feedmaster_cache_hit_ratio', (total - results['miss']) / total if total else 0.0, cache=cache)
+        metrics.set('feedmaster_queue_depth', len(self.queue))
+        for name, sink in self.sinks.items():
+            metrics.set('feedmaster_sink_queue_depth', sink.stats()['queued'], sink=name)
+        for state, count in self.outbox.counts().items():
+            metrics.set('feedmaster_outbox_deliveries', count, state=state)
+    
+    def _count_achievements(self, outcome: str, achievements: List[Dict]):
+        for achievement in achievements:
+            self.metrics.inc('feedmaster_achievements_total', feed=achievement_feed(achievement) or 'unknown', outcome=outcome)
+    
+    def _skip(self, achievement_ids: List[int], reason: str, outcome: str):
+        """Skip achievements' pending deliveries, counting them as dropped under their feeds"""
+        for feed, count in self.outbox.feed_counts(achievement_ids).items():
+            self.metrics.inc('feedmaster_achievements_total', count, feed=feed or 'unknown', outcome=outcome)
+        self.outbox.skip(achievement_ids, reason)
+    
+    def _migrate_legacy_cursors(self):
+        """Import cursors from the old /tmp files into the outbox once"""
+        legacy = {}
+        try:
+            if os.path.exists('/tmp/achievement_cursor.txt'):
+                with open('/tmp/achievement_cursor.txt', 'r') as f:
+                    legacy['global'] = int(f.read().strip())
+            if os.path.exists('/tmp/achievement_feed_cursors.json'):
+                with open('/tmp/achievement_feed_cursors.json', 'r') as f:
+                    legacy.update({f"feed:{feed_id}": int(cursor) for feed_id, cursor in json.load(f).items()})
+        except Exception as e:
+            logger.warning(f"Failed to read legacy cursor files: {e}")
+        
+        saved = self.outbox.get_cursors()
+        legacy = {name: value for name, value in legacy.items() if name not in saved}
+        if legacy:
+            self.outbox.set_cursors(legacy)
+            logger.info(f"Migrated legacy cursors into {self.state_db_path}: {legacy}")
+    
+    @staticmethod
+    def _seen_keys(achievement: Dict) -> tuple:
+        """Keys identifying an achievement by ID and by who earned what"""
+        return (
+            f"id:{achievement.get('id')}",
+            f"award:{achievement.get('user_handle', '').lower()}:{achievement.get('achievement_name', '')}"
+        )
+    
+    def _is_duplicate(self, achievement: Dict) -> bool:
+        """Check whether this achievement (or the same award under another ID) was already posted"""
+        return any(key in self.seen_index for key in self._seen_keys(achievement))
+    
+    def _remember_posted(self, achievement: Dict):
+        for key in self._seen_keys(achievement):
+            self.seen_index.add(key)
+    
+    @property
+    def platforms(self) -> List[str]:
+        """Sinks achievements are delivered to"""
+        return [name for name, sink in self.sinks.items() if sink.enabled]
+    
+    async def authenticate_bluesky(self):
+        """Authenticate with Bluesky, resuming the saved session when possible"""
+        if not self.bluesky_username and not self.bluesky_did:
+            logger.info("No Bluesky credentials provided, skipping authentication")
+            return
+        # Try username first, then DID as fallback
+        login_identifier = self.bluesky_username or self.bluesky_did
+        session_string = self._load_bluesky_session(login_identifier)
+        if session_string:
+            try:
+                self.bluesky_client = self._new_bluesky_client()
+                await self.bluesky_client.login(session_string=session_string)
+                self._record_bluesky_session(Session.decode(self.bluesky_client.export_session_string()))
+                logger.info(f"Resumed saved Bluesky session for {login_identifier}")
+                return
+            except (BadRequestError, UnauthorizedError, LoginRequiredError) as e:
+                # Refresh token expired or revoked
+                logger.warning(f"Saved Bluesky session was rejected ({e}), logging in again")
+        try:
+            self.bluesky_client = self._new_bluesky_client()
+            await self.bluesky_client.login(login_identifier, self.bluesky_app_password)
+            self._record_bluesky_session(Session.decode(self.bluesky_client.export_session_string()))
+            logger.info(f"Successfully authenticated with Bluesky as {login_identifier}")
+        except Exception as e:
+            logger.error(f"Failed to authenticate with Bluesky: {e}")
+            raise
+    
+    def _new_bluesky_client(self) -> AsyncClient:
+        client = AsyncClient()
+        
+        # A plain function, older atproto releases silently ignore bound methods as callbacks
+        async def on_session_change(event, session: Session):
+            self._record_bluesky_session(session)
+        client.on_session_change(on_session_change)
+        return client
+    
+    def _load_bluesky_session(self, login_identifier: str) -> Optional[str]:
+        """Saved session string for this account, unless its refresh token has expired"""
+        try:
+            with open(self.bluesky_session_path) as f:
+                session_string = f.read().strip()
+            session = Session.decode(session_string)
+            refresh_expires_at = session.refresh_jwt_payload.exp
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable Bluesky session file {self.bluesky_session_path}: {e}")
+            return None
+        if login_identifier not in (session.handle, session.did):
+            logger.info(f"Saved Bluesky session belongs to {session.handle}, logging in as {login_identifier}")
+            return None
+        if refresh_expires_at and refresh_expires_at <= time.time():
+            logger.info("Saved Bluesky session has expired, logging in again")
+            return None
+        return session_string
+    
+    def _record_bluesky_session(self, session: Session):
+        """Note the account and when the session expires, and persist it (readable by the owner only) whenever it changes"""
+        self._bluesky_did = session.did
+        self._bluesky_host = urlparse(session.pds_endpoint or '').netloc or 'bluesky'
+        self._bluesky_session_expires_at = session.access_jwt_payload.exp or time.time() + BLUESKY_ACCESS_TOKEN_LIFETIME_SECONDS
+        session_string = session.export()
+        if session_string == self._bluesky_session_string:
+            return
+        self._bluesky_session_string = session_string
+        directory = os.path.dirname(self.bluesky_session_path) or '.'
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # mkstemp creates the file with mode 0600
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.bluesky_session.')
+            with os.fdopen(fd, 'w') as f:
+                f.write(session_string)
+            os.replace(tmp_path, self.bluesky_session_path)
+        except OSError as e:
+            logger.warning(f"Failed to save Bluesky session: {e}")
+    
+    async def _keep_bluesky_session(self):
+        """Refresh the Bluesky session ahead of access token expiry, even while the bot is idle"""
+        while True:
+            delay = self._bluesky_session_expires_at - self.bluesky_refresh_margin_minutes * 60 - time.time()
+            await asyncio.sleep(max(60.0, delay))
+            try:
+                await self._refresh_bluesky_session()
+                logger.info("Refreshed Bluesky session")
+            except (BadRequestError, UnauthorizedError, LoginRequiredError) as e:
+                logger.warning(f"Bluesky session refresh was rejected ({e}), logging in again")
+                try:
+                    await self.bluesky_client.login(self.bluesky_username or self.bluesky_did, self.bluesky_app_password,
+                                                    fetch_bsky_profile=False)
+                    self._record_bluesky_session(Session.decode(self.bluesky_client.export_session_string()))
+                except Exception as e:
+                    logger.error(f"Failed to authenticate with Bluesky: {e}")
+            except Exception as e:
+                logger.error(f"Failed to refresh Bluesky session: {e}")
+    
+    async def _refresh_bluesky_session(self):
+        """Exchange the refresh token for a new session and hand it to the client"""
+        current = Session.decode(self.bluesky_client.export_session_string())
+        response = await self.bluesky_client.com.atproto.server.refresh_session(
+            headers={'Authorization': f"Bearer {current.refresh_jwt}"}
+        )
+        session = Session(response.handle, response.did, response.access_jwt, response.refresh_jwt, current.pds_endpoint)
+        self._record_bluesky_session(session)
+        # Importing the session string is the client's public way to adopt a session, the profile is already known
+        await self.bluesky_client.login(session_string=session.export(), fetch_bsky_profile=False)
+    
+    async def _fetch_achievement_page(self, feed_ids: List[str], since_id: int, limit: int) -> List[Dict]:
+        """Fetch a single page of achievements newer than since_id"""
+        url = f"{self.feedmaster_api_url}/api/v1/achievements/recent"
+        params = {
+            'feed_ids': ','.join(feed_ids),
+            'since_id': since_id,
+            'limit': limit
+        }
+        
+        # Conditional request so an unchanged poll costs a 304 instead of a JSON body
+        validator_key = (url, tuple(sorted(params.items())))
+        headers = {}
+        etag, last_modified = self._validators.get(validator_key, (None, None))
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        
+        with self.metrics.timer('feedmaster_fetch_seconds'):
+            response = await self.http.get(url, params=params, headers=headers)
+        self._honor_backoff_headers(response)
+        if response.status_code == 304:
+            return []
+        response.raise_for_status()
+        data = response.json()
+        
+        if response.headers.get('etag') or response.headers.get('last-modified'):
+            self._validators[validator_key] = (response.headers.get('etag'), response.headers.get('last-modified'))
+            self._validators.move_to_end(validator_key)
+            while len(self._validators) > 256:
+                self._validators.popitem(last=False)
+        
+        return data.get('achievements', [])
+    
+    def _honor_backoff_headers(self, response: httpx.Response):
+        """Delay the next poll when the server asks us to slow down"""
+        delay = None
+        if response.status_code in (429, 503):
+            delay = parse_retry_after(response.headers.get('retry-after'))
+            if delay is None:
+                delay = 60.0
+        elif response.headers.get('x-ratelimit-remaining') == '0':
+            delay = parse_retry_after(response.headers.get('x-ratelimit-reset-after') or response.headers.get('retry-after'))
+        
+        if delay is not None:
+            logger.warning(f"Feedmaster asked us to back off for {delay:.0f}s (HTTP {response.status_code})")
+            self.scheduler.request_backoff(delay)
+    
+    async def iter_achievement_pages(self, feed_ids: Optional[List[str]] = None, since_id: Optional[int] = None) -> AsyncIterator[List[Dict]]:
+        """Walk since_id pages until caught up or the per-poll page budget is spent"""
+        feed_ids = feed_ids or self.feed_ids
+        cursor = self.last_processed_id if since_id is None else since_id
+        
+        for page_number in range(1, self.fetch_max_pages + 1):
+            page = await self._fetch_achievement_page(feed_ids, cursor, self.fetch_page_size)
+            logger.info(f"Page {page_number}: {len(page)} achievements since ID {cursor}")
+            if not page:
+                return
+            
+            yield page
+            
+            page_max_id = max(achievement.get('id', 0) for achievement in page)
+            if len(page) < self.fetch_page_size or page_max_id <= cursor:
+                return
+            cursor = page_max_id
+        
+        self._backlog_pending = True
+        logger.info(f"Page budget of {self.fetch_max_pages} reached, remaining backlog deferred to next poll")
+    
+    async def _discover_head(self, feed_ids: List[str]) -> int:
+        """Find the newest achievement ID by galloping then bisecting on since_id"""
+        async def newest_after(since_id: int) -> Optional[int]:
+            page = await self._fetch_achievement_page(feed_ids, since_id, 1)
+            return page[0].get('id', since_id + 1) if page else None
         
-        # Initialize image generator
-        self.cache_dir = "/tmp/achievement_cards"
-        os.makedirs(self.cache_dir, exist_ok=True)
+        first = await newest_after(0)
+        if first is None:
+            return 0
+        
+        # Gallop: double the probe until it lands past the head
+        low, step = first, 1024
+        high = low + step
+        while (found := await newest_after(high)) is not None:
+            low = max(found, high + 1)
+            step *= 2
+            high = low + step
+        
+        # Bisect: low is a known ID, nothing exists after high
+        while low < high:
+            middle = (low + high) // 2
+            found = await newest_after(middle)
+            if found is None:
+                high = middle
+            else:
+                low = max(found, middle + 1)
+        return low
     
-    def _load_cursor(self) -> int:
-        """Load last processed achievement ID from file"""
-        try:
-            if os.path.exists(self.cursor_file):
-                with open(self.cursor_file, 'r') as f:
-                    return int(f.read().strip())
-        except Exception as e:
-            logger.warning(f"Failed to load cursor: {e}")
-        return 0  # Start from beginning if no cursor
+    async def _cold_start_cursor(self, feed_ids: List[str]) -> int:
+        """Pick a starting cursor for feeds that have no saved cursor"""
+        if self.cold_start_mode == 'replay':
+            return 0
+        
+        head = await self._discover_head(feed_ids)
+        lookback = self.cold_start_lookback if self.cold_start_mode == 'lookback' else 0
+        logger.info(f"Discovered head achievement ID {head} for feeds {feed_ids}")
+        return max(0, head - lookback)
     
-    def _save_cursor(self, achievement_id: int):
-        """Save last processed achievement ID to file"""
-        try:
-            with open(self.cursor_file, 'w') as f:
-                f.write(str(achievement_id))
-        except Exception as e:
-            logger.warning(f"Failed to save cursor: {e}")
+    async def _resolve_cold_start(self):
+        """Pick a starting cursor when no saved cursor exists"""
+        cursor = await self._cold_start_cursor(self.feed_ids)
+        self.last_processed_id = cursor
+        self.outbox.set_cursors({'global': cursor})
+        logger.info(f"Cold start ({self.cold_start_mode}): starting from achievement ID {cursor}")
     
-    async def authenticate_bluesky(self):
-        """Authenticate with Bluesky"""
-        if not self.bluesky_username and not self.bluesky_did:
-            logger.info("No Bluesky credentials provided, skipping authentication")
-            return
-        try:
-            self.bluesky_client = Client()
-            # Try username first, then DID as fallback
-            login_identifier = self.bluesky_username or self.bluesky_did
-            self.bluesky_client.login(login_identifier, self.bluesky_app_password)
-            logger.info(f"Successfully authenticated with Bluesky as {login_identifier}")
-        except Exception as e:
-            logger.error(f"Failed to authenticate with Bluesky: {e}")
-            raise
+    async def _fetch_feed(self, feed_id: str, semaphore: asyncio.Semaphore) -> List[Dict]:
+        """Drain one feed from its own cursor, returning achievements sorted by ID"""
+        async with semaphore:
+            cursor = self.feed_cursors.get(feed_id)
+            if cursor is None:
+                # Carry over the combined cursor when switching modes, otherwise cold start
+                cursor = self.last_processed_id if self.last_processed_id is not None else await self._cold_start_cursor([feed_id])
+                self.feed_cursors[feed_id] = cursor
+                self.outbox.set_cursors({f"feed:{feed_id}": cursor})
+                logger.info(f"Feed {feed_id}: starting from achievement ID {cursor}")
+            
+            achievements = []
+            async for page in self.iter_achievement_pages([feed_id], cursor):
+                achievements.extend(page)
+        
+        for achievement in achievements:
+            achievement['_feed_id'] = feed_id
+        achievements.sort(key=lambda achievement: achievement.get('id', 0))
+        if achievements:
+            self._pending_feed_cursors[feed_id] = max(cursor, achievements[-1].get('id', 0))
+        logger.info(f"Feed {feed_id}: {len(achievements)} achievements since ID {cursor}")
+        return achievements
+    
+    async def _get_per_feed_achievements(self) -> List[Dict]:
+        """Fetch every feed concurrently and heap-merge the results by achievement ID"""
+        semaphore = asyncio.Semaphore(self.fetch_concurrency)
+        results = await asyncio.gather(
+            *(self._fetch_feed(feed_id, semaphore) for feed_id in self.feed_ids),
+            return_exceptions=True
+        )
+        
+        streams = []
+        for feed_id, result in zip(self.feed_ids, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to fetch achievements for feed {feed_id}: {result}")
+            else:
+                streams.append(result)
+        
+        # Merge sorted per-feed streams, dropping achievements that appear in several feeds
+        merged = []
+        seen_ids = set()
+        for achievement in heapq.merge(*streams, key=lambda achievement: achievement.get('id', 0)):
+            achievement_id = achievement.get('id')
+            if achievement_id is not None and achievement_id in seen_ids:
+                continue
+            seen_ids.add(achievement_id)
+            merged.append(achievement)
+        return merged
     
     async def get_recent_achievements(self) -> List[Dict]:
-        """Fetch recent achievements from Feedmaster API"""
+        """Fetch recent achievements from Feedmaster API, draining the backlog page by page"""
+        achievements = []
+        self._backlog_pending = False
+        self._fetch_failed = False
         try:
-            feed_ids_str = ','.join(self.feed_ids)
-            url = f"{self.feedmaster_api_url}/api/v1/achievements/recent"
-            params = {
-                'feed_ids': feed_ids_str,
-                'since_id': self.last_processed_id,
-                'limit': 50
-            }
+            if self.fetch_mode == 'per_feed':
+                achievements = await self._get_per_feed_achievements()
+                self._last_fetch_count = len(achievements)
+                logger.info(f"Found {len(achievements)} recent achievements across {len(self.feed_ids)} feeds")
+                return achievements
             
-            logger.info(f"Fetching achievements from: {url}")
-            logger.info(f"Params: {params}")
+            if self.last_processed_id is None:
+                await self._resolve_cold_start()
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, params=params)
-                logger.info(f"API Response status: {response.status_code}")
-                response.raise_for_status()
-                data = response.json()
-                
-                achievements = data.get('achievements', [])
-                logger.info(f"Found {len(achievements)} recent achievements")
-                if achievements:
-                    logger.info(f"Sample achievement data: {achievements[0]}")
-                return achievements
+            logger.info(f"Fetching achievements for feeds {self.feed_ids} since ID {self.last_processed_id}")
+            async for page in self.iter_achievement_pages():
+                achievements.extend(page)
+            
+            self._last_fetch_count = len(achievements)
+            logger.info(f"Found {len(achievements)} recent achievements")
+            return achievements
                 
         except Exception as e:
+            self._last_fetch_count = len(achievements)
+            self._fetch_failed = True
+            self.scheduler.record_error()
             logger.error(f"Failed to fetch achievements: {e}")
             logger.error(f"Exception type: {type(e).__name__}")
             import traceback
             logger.error(f"Traceback: {traceback.format_exc()}")
-            return []
+            # Keep whatever pages arrived before the failure
+            return achievements
     
-    def should_post_achievement(self, achievement: Dict) -> bool:
-        """Check if achievement meets posting criteria"""
-        rarity_tier = achievement.get('rarity_tier')
+    def _stream_cursor(self) -> int:
+        """Achievement ID the event stream should resume after"""
+        # Resume after the feed furthest behind, the seen index and outbox drop what the others already had
+        cursors = [self.feed_cursors[feed_id] for feed_id in self.feed_ids if feed_id in self.feed_cursors]
+        if self.fetch_mode == 'per_feed' and cursors:
+            return min(cursors)
+        if self.last_processed_id is not None:
+            return self.last_processed_id
+        return min(cursors, default=0)
+    
+    async def _read_stream(self, queue: asyncio.Queue):
+        """Parse Server-Sent Events into achievements, ending the queue with None"""
+        try:
+            cursor = self._stream_cursor()
+            params = {'feed_ids': ','.join(self.feed_ids), 'since_id': cursor}
+            headers = {'Accept': 'text/event-stream', 'Last-Event-ID': str(cursor)}
+            timeout = httpx.Timeout(self.http_timeout, read=self.stream_read_timeout)
+            
+            async with self.http.stream('GET', self.stream_url, params=params, headers=headers, timeout=timeout) as response:
+                response.raise_for_status()
+                logger.info(f"Connected to achievement stream, resuming after ID {cursor}")
+                
+                event_type, data_lines = 'message', []
+                async for line in response.aiter_lines():
+                    if line.startswith(':'):
+                        continue  # Heartbeat comment
+                    if line:
+                        field, _, value = line.partition(':')
+                        value = value[1:] if value.startswith(' ') else value
+                        if field == 'event':
+                            event_type = value
+                        elif field == 'data':
+                            data_lines.append(value)
+                        continue
+                    
+                    # Blank line dispatches the event
+                    if data_lines and event_type in ('message', 'achievement'):
+                        payload = json.loads('\n'.join(data_lines))
+                        for achievement in (payload if isinstance(payload, list) else [payload]):
+                            await queue.put(achievement)
+                    event_type, data_lines = 'message', []
+        finally:
+            await queue.put(None)
+    
+    async def _consume_stream(self) -> int:
+        """Feed streamed achievements to the posting path in small batches, returning how many arrived"""
+        queue: asyncio.Queue = asyncio.Queue()
+        reader = asyncio.create_task(self._read_stream(queue))
+        loop = asyncio.get_running_loop()
+        received = 0
         
-        # Skip achievements with null/missing rarity (not yet calculated)
-        if not rarity_tier:
-            logger.warning(f"Skipping achievement {achievement.get('achievement_name')} - rarity not calculated yet")
-            return False
+        try:
+            ended = False
+            while not ended:
+                achievement = await queue.get()
+                if achievement is None:
+                    break
+                
+                # Collect whatever else arrives within the batch window
+                batch = [achievement]
+                deadline = loop.time() + self.stream_batch_seconds
+                while (remaining := deadline - loop.time()) > 0:
+                    try:
+                        achievement = await asyncio.wait_for(queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    if achievement is None:
+                        ended = True
+                        break
+                    batch.append(achievement)
+                
+                received += len(batch)
+                logger.info(f"Received {len(batch)} achievements from stream")
+                await self.process_achievements(batch)
+            
+            await reader  # Surface connection errors
+        finally:
+            reader.cancel()
+        return received
+    
+    async def run_stream(self):
+        """Consume the event stream, reconnecting until it fails too many times in a row"""
+        failures = 0
+        while failures < self.stream_max_failures:
+            try:
+                if self.last_processed_id is None and not self.feed_cursors:
+                    await self._resolve_cold_start()
+                if await self._consume_stream():
+                    failures = 0
+                else:
+                    failures += 1
+                    logger.warning(f"Achievement stream closed without events ({failures}/{self.stream_max_failures})")
+            except Exception as e:
+                failures += 1
+                logger.warning(f"Achievement stream error ({failures}/{self.stream_max_failures}): {e}")
             
-        min_rarity_level = self.rarity_order.get(self.min_rarity_tier, 0)
-        achievement_rarity_level = self.rarity_order.get(rarity_tier, 0)
+            if 0 < failures < self.stream_max_failures:
+                await asyncio.sleep(min(60, 2 ** failures))
         
-        return achievement_rarity_level >= min_rarity_level
+        logger.warning(f"Achievement stream unavailable, falling back to polling for {self.stream_retry_minutes} minutes")
     
     def format_message(self, achievement: Dict) -> tuple[str, Optional[str]]:
-        """Format the Bluesky post message and return message + share_url"""
+        """Format the post message (using the feed's template if it has one) and return message + share_url"""
         username = achievement.get('user_handle', 'unknown')
         display_name = achievement.get('user_display_name')
         if not display_name or display_name.strip() == '':
@@ -189,7 +2890,8 @@ class FeedmasterBlueskyBot:
         rarity_percentage = achievement.get('rarity_percentage', 0)
         
         # Format the message
-        message = self.message_template.format(
+        template = self.rules.rule_for(achievement).message_template or self.message_template
+        message = template.format(
             username=username,
             display_name=display_name,
             achievement=achievement_name,
@@ -201,152 +2903,122 @@ class FeedmasterBlueskyBot:
         return message, share_url
     
     async def fetch_url_metadata(self, url: str) -> Optional[Dict]:
-        """Fetch metadata for URL to create link card"""
+        """Fetch metadata for URL to create link card, cached for LINK_METADATA_TTL_MINUTES"""
+        metadata = self.link_metadata_cache.get(url)
+        if metadata is not None:
+            return metadata
+        
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                async with httpx.AsyncClient(
-                    timeout=30.0, 
-                    follow_redirects=True,
-                    limits=httpx.Limits(max_connections=10)
-                ) as client:
-                    response = await client.get(url, headers={
-                        'User-Agent': 'Mozilla/5.0 (compatible; FeedmasterBot/1.0)',
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                        'Accept-Language': 'en-US,en;q=0.5',
-                        'Accept-Encoding': 'gzip, deflate',
-                        'Connection': 'keep-alive'
-                    })
-                    response.raise_for_status()
-                    
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Extract metadata with better fallbacks
-                    title = None
-                    description = None
-                    image_url = None
-                    
-                    # Try Open Graph tags first
-                    og_title = soup.find('meta', property='og:title')
-                    if og_title and og_title.get('content'):
-                        title = og_title.get('content').strip()
-                    
-                    og_description = soup.find('meta', property='og:description')
-                    if og_description and og_description.get('content'):
-                        description = og_description.get('content').strip()
-                    
-                    og_image = soup.find('meta', property='og:image')
-                    if og_image and og_image.get('content'):
-                        image_url = og_image.get('content').strip()
-                    
-                    # Fallback to standard meta tags
-                    if not title:
-                        title_tag = soup.find('title')
-                        if title_tag and title_tag.get_text():
-                            title = title_tag.get_text().strip()
-                    
-                    if not description:
-                        desc_tag = soup.find('meta', attrs={'name': 'description'})
-                        if desc_tag and desc_tag.get('content'):
-                            description = desc_tag.get('content').strip()
-                    
-                    # Ensure we have required fields
-                    if not title:
-                        title = "Achievement Unlocked"
-                    if not description:
-                        description = "View this achievement on Feedmaster"
-                    
-                    # Download and upload image to Bluesky if available
-                    image_blob = None
-                    if image_url:
-                        try:
-                            # Make image URL absolute if relative
-                            if image_url.startswith('//'):
-                                image_url = 'https:' + image_url
-                            elif image_url.startswith('/'):
-                                from urllib.parse import urljoin
-                                image_url = urljoin(url, image_url)
-                            
-                            img_response = await client.get(image_url, timeout=15.0)
-                            img_response.raise_for_status()
-                            
-                            # Check content type
-                            content_type = img_response.headers.get('content-type', '')
-                            if content_type.startswith('image/'):
-                                # Upload image to Bluesky
-                                upload_result = self.bluesky_client.upload_blob(img_response.content)
-                                image_blob = upload_result.blob if hasattr(upload_result, 'blob') else upload_result
-                                logger.info(f"Uploaded image blob for {url}")
-                            else:
-                                logger.warning(f"Invalid image content type: {content_type}")
-                        except Exception as e:
-                            logger.warning(f"Failed to upload image for {url}: {e}")
-                    
-                    # Properly encode the URL before returning
-                    from urllib.parse import quote, urlparse, urlunparse
-                    parsed = urlparse(url)
-                    encoded_path = quote(parsed.path, safe='/')
-                    encoded_url = urlunparse((parsed.scheme, parsed.netloc, encoded_path, parsed.params, parsed.query, parsed.fragment))
-                    
-                    return {
-                        'title': title[:300],
-                        'description': description[:300],
-                        'image_blob': image_blob,
-                        'url': encoded_url
-                    }
-                    
+                page = await self._read_page_metadata(url)
+                break
             except Exception as e:
                 logger.warning(f"Attempt {attempt + 1} failed to fetch metadata for {url}: {e}")
                 if attempt < max_retries - 1:
                     await asyncio.sleep(2 ** attempt)  # Exponential backoff
                 else:
                     logger.error(f"All {max_retries} attempts failed for {url}")
+                    return None
         
-        return None
+        # Upload the image to Bluesky, once per image URL
+        image_blob = None
+        image_url = page['image_url']
+        if image_url and self.bluesky_client:
+            image_blob = self.link_image_cache.get(image_url)
+            if image_blob is None:
+                try:
+                    img_response = await self.http.get(image_url, timeout=15.0, follow_redirects=True)
+                    img_response.raise_for_status()
+                    
+                    # Check content type
+                    content_type = img_response.headers.get('content-type', '')
+                    if content_type.startswith('image/'):
+                        image_blob, _ = await self._card_blob(img_response.content)
+                        self.link_image_cache.put(image_url, image_blob)
+                        logger.info(f"Uploaded image blob for {url}")
+                    else:
+                        logger.warning(f"Invalid image content type: {content_type}")
+                except Exception as e:
+                    logger.warning(f"Failed to upload image for {url}: {e}")
+        
+        # Properly encode the URL before returning
+        parsed = urlparse(url)
+        encoded_path = quote(parsed.path, safe='/')
+        encoded_url = urlunparse((parsed.scheme, parsed.netloc, encoded_path, parsed.params, parsed.query, parsed.fragment))
+        
+        metadata = {
+            'title': page['title'][:300],
+            'description': page['description'][:300],
+            'image_blob': image_blob,
+            'url': encoded_url
+        }
+        if image_blob is not None or not image_url:
+            self.link_metadata_cache.put(url, metadata)
+        return metadata
     
-    async def post_to_discord(self, message: str, achievement: Dict) -> bool:
-        """Post achievement to Discord webhook"""
-        if not self.discord_webhook_url:
-            return False
-            
-        try:
-            # Create Discord embed
-            embed = {
-                "title": f"🎉 {achievement.get('achievement_name', 'Achievement Unlocked')}",
+    async def _read_page_metadata(self, url: str) -> Dict:
+        """Stream a page until its <head> ends (or LINK_METADATA_MAX_KB), returning title, description and image URL"""
+        parser = OpenGraphParser()
+        max_bytes = self.link_metadata_max_kb * 1024
+        received = 0
+        async with self.http.stream('GET', url, follow_redirects=True, headers={
+            'User-Agent': 'Mozilla/5.0 (compatible; FeedmasterBot/1.0)',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5'
+        }) as response:
+            response.raise_for_status()
+            try:
+                decoder = codecs.getincrementaldecoder(response.charset_encoding or 'utf-8')(errors='replace')
+            except LookupError:
+                decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            async for chunk in response.aiter_bytes():
+                chunk = chunk[:max_bytes - received]
+                received += len(chunk)
+                parser.feed(decoder.decode(chunk))
+                if parser.done or received >= max_bytes:
+                    break
+            page_url = str(response.url)
+        
+        # Open Graph tags first, then the standard title and description
+        meta = parser.meta
+        image_url = meta.get('og:image')
+        return {
+            'title': meta.get('og:title') or parser.title.strip() or "Achievement Unlocked",
+            'description': meta.get('og:description') or meta.get('description') or "View this achievement on Feedmaster",
+            # Make image URL absolute if relative
+            'image_url': urljoin(page_url, image_url) if image_url else None
+        }
+    
+    def _discord_embed(self, message: str, achievement: Dict) -> Dict:
+        """Discord embed for an achievement"""
+        if achievement.get('digest'):
+            return {
+                "title": f"🏆 {achievement['achievement_name']}",
                 "description": message,
-                "color": self._get_rarity_color(achievement.get('rarity_tier', 'Bronze')),
-                "thumbnail": {
-                    "url": achievement.get('user_avatar_url', '')
-                },
-                "fields": [
-                    {
-                        "name": "User",
-                        "value": f"@{achievement.get('user_handle', 'unknown')}",
-                        "inline": True
-                    },
-                    {
-                        "name": "Rarity",
-                        "value": f"{achievement.get('rarity_tier', 'Bronze')} ({achievement.get('rarity_percentage', 0):.2f}%)",
-                        "inline": True
-                    }
-                ],
-                "url": achievement.get('share_url', '')
-            }
-            
-            payload = {
-                "embeds": [embed]
+                "color": self._get_rarity_color(achievement.get('rarity_tier', 'Bronze'))
             }
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(self.discord_webhook_url, json=payload)
-                response.raise_for_status()
-                
-            logger.info("Successfully posted to Discord")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to post to Discord: {e}")
-            return False
+        return {
+            "title": f"🎉 {achievement.get('achievement_name', 'Achievement Unlocked')}",
+            "description": message,
+            "color": self._get_rarity_color(achievement.get('rarity_tier', 'Bronze')),
+            "thumbnail": {
+                "url": achievement.get('user_avatar_url', '')
+            },
+            "fields": [
+                {
+                    "name": "User",
+                    "value": f"@{achievement.get('user_handle', 'unknown')}",
+                    "inline": True
+                },
+                {
+                    "name": "Rarity",
+                    "value": f"{achievement.get('rarity_tier', 'Bronze')} ({achievement.get('rarity_percentage', 0):.2f}%)",
+                    "inline": True
+                }
+            ],
+            "url": achievement.get('share_url', '')
+        }
     
     def _get_rarity_color(self, rarity_tier: str) -> int:
         """Get Discord embed color for rarity tier"""
@@ -361,37 +3033,10 @@ class FeedmasterBlueskyBot:
         }
         return colors.get(rarity_tier, 0xCD7F32)
     
-    def _get_font(self, size: int):
-        """Get font with multiple fallbacks - FIXED VERSION"""
-        font_paths = [
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
-            "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf", 
-            "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf",
-            "/System/Library/Fonts/Arial.ttf",
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
-        ]
-        
-        for font_path in font_paths:
-            try:
-                return ImageFont.truetype(font_path, size)
-            except:
-                continue
-        
-        # If all fail, use default font with original size
-        logger.warning(f"All fonts failed, using default with size {size}")
-        try:
-            return ImageFont.load_default(size)
-        except:
-            return ImageFont.load_default()
-    
     async def _download_avatar(self, avatar_url: str) -> Image.Image:
         """Download and process user avatar"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(avatar_url, timeout=10)
-                response.raise_for_status()
-                avatar = Image.open(BytesIO(response.content)).convert('RGBA')
-                return avatar.resize((200, 200), Image.Resampling.LANCZOS)
+            return await self.avatar_cache.get(avatar_url)
         except Exception as e:
             logger.warning(f"Failed to download avatar {avatar_url}: {e}")
             # Return default avatar
@@ -400,249 +3045,599 @@ class FeedmasterBlueskyBot:
             draw.ellipse([0, 0, 200, 200], fill=(100, 100, 100, 255))
             return avatar
     
-    async def generate_achievement_card(self, achievement: Dict) -> Optional[str]:
-        """Generate achievement card image and return file path"""
+    def _card_fields(self, achievement: Dict) -> tuple:
+        """Text fields, avatar URL and cache key for an achievement's card"""
+        user_name = achievement.get('user_display_name') or achievement.get('user_handle', 'Unknown')
+        achievement_name = achievement.get('achievement_name', 'Unknown Achievement')
+        rarity_tier = achievement.get('rarity_tier', 'Bronze')
+        # Get avatar URL from API response
+        user_avatar_url = achievement.get('user_avatar_url', '')
+        cache_key = self.card_cache.key(user_avatar_url, achievement_name, user_name, rarity_tier,
+                                        self.card_format, str(self.card_quality), str(self.card_max_bytes))
+        return achievement_name, user_name, rarity_tier, user_avatar_url, cache_key
+    
+    async def generate_achievement_card(self, achievement: Dict) -> Optional[bytes]:
+        """Generate achievement card image and return the encoded bytes"""
+        cards = await self.render_achievement_cards([achievement])
+        return cards[0]
+    
+    async def render_achievement_cards(self, achievements: List[Dict]) -> List[Optional[bytes]]:
+        """Generate cards for a batch of achievements in parallel, returning encoded images"""
+        cards: List[Optional[bytes]] = [None] * len(achievements)
+        to_render = []
+        for index, achievement in enumerate(achievements):
+            achievement_name, user_name, rarity_tier, user_avatar_url, cache_key = self._card_fields(achievement)
+            cards[index] = self.card_cache.get(cache_key)
+            if cards[index] is None:
+                to_render.append((index, achievement_name, user_name, rarity_tier, user_avatar_url, cache_key))
+        if not to_render:
+            return cards
+        
+        # Download avatars concurrently, then render every card across the worker pool
+        async def avatar_for(url: str) -> Optional[Image.Image]:
+            return await self._download_avatar(url) if url and url.strip() else None
+        avatars = await asyncio.gather(*(avatar_for(card[4]) for card in to_render))
+        rendered = await self.card_renderer.render_batch([
+            (achievement_name, user_name, rarity_tier, avatar)
+            for (_, achievement_name, user_name, rarity_tier, _, _), avatar in zip(to_render, avatars)
+        ])
+        
+        for (index, *_, cache_key), card_data in zip(to_render, rendered):
+            if card_data is None:
+                continue
+            if len(card_data) > self.card_max_bytes:
+                logger.warning(f"Achievement card is {len(card_data)} bytes even at the lowest quality (budget {self.card_max_bytes})")
+            self.card_cache.put(cache_key, card_data)
+            logger.info(f"Generated achievement card {cache_key[:12]} ({len(card_data)} bytes)")
+            cards[index] = card_data
+        return cards
+    
+    async def render_digest_card(self, achievements: List[Dict]) -> Optional[bytes]:
+        """Collage of the digest's avatars with their tier badges"""
+        async def avatar_for(url: str) -> Optional[Image.Image]:
+            return await self._download_avatar(url) if url and url.strip() else None
+        avatars = await asyncio.gather(*(avatar_for(achievement.get('user_avatar_url', '')) for achievement in achievements))
         try:
-            user_name = achievement.get('user_display_name') or achievement.get('user_handle', 'Unknown')
-            achievement_name = achievement.get('achievement_name', 'Unknown Achievement')
-            rarity_tier = achievement.get('rarity_tier', 'Bronze')
-            # Get avatar URL from API response
-            user_avatar_url = achievement.get('user_avatar_url', '')
-            
-            # Generate cache key
-            content = f"{user_avatar_url}:{achievement_name}:{user_name}:v16_PERFECT"
-            cache_key = hashlib.md5(content.encode()).hexdigest()
-            cache_path = os.path.join(self.cache_dir, f"{cache_key}.png")
-            
-            # Return cached version if exists
-            if os.path.exists(cache_path):
-                return cache_path
-            
-            # Create new card
-            width, height = 1200, 630
-            
-            # Create gradient background
-            img = Image.new('RGB', (width, height))
-            draw = ImageDraw.Draw(img)
-            
-            # Create gradient from dark blue to purple
-            for y in range(height):
-                ratio = y / height
-                r = int(43 + (88 - 43) * ratio)  # 43 -> 88
-                g = int(45 + (101 - 45) * ratio)  # 45 -> 101
-                b = int(49 + (242 - 49) * ratio)  # 49 -> 242
-                draw.line([(0, y), (width, y)], fill=(r, g, b))
-            
-            # Download and add user avatar if available
-            logger.info(f"Avatar URL: {user_avatar_url}")
-            if user_avatar_url and user_avatar_url.strip():
-                avatar = await self._download_avatar(user_avatar_url)
-                
-                # Make avatar circular (larger size)
-                avatar_size = 200
-                mask = Image.new('L', (avatar_size, avatar_size), 0)
-                mask_draw = ImageDraw.Draw(mask)
-                mask_draw.ellipse([0, 0, avatar_size, avatar_size], fill=255)
-                
-                # Create circular avatar
-                circular_avatar = Image.new('RGBA', (avatar_size, avatar_size), (0, 0, 0, 0))
-                circular_avatar.paste(avatar, (0, 0))
-                circular_avatar.putalpha(mask)
-                
-                # Add white border around avatar
-                border_size = 8
-                border_avatar = Image.new('RGBA', (avatar_size + border_size * 2, avatar_size + border_size * 2), (255, 255, 255, 255))
-                border_mask = Image.new('L', (avatar_size + border_size * 2, avatar_size + border_size * 2), 0)
-                border_draw = ImageDraw.Draw(border_mask)
-                border_draw.ellipse([0, 0, avatar_size + border_size * 2, avatar_size + border_size * 2], fill=255)
-                border_avatar.putalpha(border_mask)
-                
-                # Paste bordered avatar (centered)
-                img.paste(border_avatar, (width // 2 - (avatar_size + border_size * 2) // 2, height // 2 - (avatar_size + border_size * 2) // 2), border_avatar)
-                img.paste(circular_avatar, (width // 2 - avatar_size // 2, height // 2 - avatar_size // 2), circular_avatar)
-            
-            # Add achievement name at top
-            achievement_font = self._get_font(48)
-            achievement_bbox = draw.textbbox((0, 0), achievement_name, font=achievement_font)
-            achievement_width = achievement_bbox[2] - achievement_bbox[0]
-            draw.text((width // 2 - achievement_width // 2, 50), achievement_name, fill=(255, 255, 255), font=achievement_font)
-            
-            # Add user name below avatar
-            user_font = self._get_font(32)
-            user_bbox = draw.textbbox((0, 0), user_name, font=user_font)
-            user_width = user_bbox[2] - user_bbox[0]
-            draw.text((width // 2 - user_width // 2, height // 2 + 150), user_name, fill=(220, 221, 222), font=user_font)
-            
-            # Add "feedmaster" text at bottom
-            title_font = self._get_font(28)
-            title_text = "feedmaster"
-            title_bbox = draw.textbbox((0, 0), title_text, font=title_font)
-            title_width = title_bbox[2] - title_bbox[0]
-            draw.text((width // 2 - title_width // 2, height - 80), title_text, fill=(180, 180, 180), font=title_font)
-            
-            # Add rarity badge
-            rarity_colors = {
-                'Mythic': (255, 0, 255),
-                'Legendary': (148, 0, 211),
-                'Diamond': (185, 242, 255),
-                'Platinum': (229, 228, 226),
-                'Gold': (255, 215, 0),
-                'Silver': (192, 192, 192),
-                'Bronze': (205, 127, 50)
-            }
-            rarity_color = rarity_colors.get(rarity_tier, (205, 127, 50))
-            
-            rarity_font = self._get_font(18)
-            rarity_text = f"{rarity_tier} Achievement"
-            rarity_bbox = draw.textbbox((0, 0), rarity_text, font=rarity_font)
-            rarity_width = rarity_bbox[2] - rarity_bbox[0]
-            rarity_height = rarity_bbox[3] - rarity_bbox[1]
-            
-            # Draw rarity badge below achievement name
-            badge_padding = 12
-            badge_x = width // 2 - rarity_width // 2 - badge_padding
-            badge_y = 120
-            draw.rounded_rectangle([badge_x, badge_y, badge_x + rarity_width + (badge_padding * 2), badge_y + rarity_height + (badge_padding * 2)], 
-                                 radius=12, fill=rarity_color)
-            # Center text properly within the badge
-            text_x = width // 2 - rarity_width // 2
-            text_y = badge_y + badge_padding
-            draw.text((text_x, text_y), rarity_text, fill=(0, 0, 0), font=rarity_font)
-            
-            # Save to cache
-            img.save(cache_path, 'PNG', optimize=True)
-            logger.info(f"Generated achievement card: {cache_path}")
-            
-            return cache_path
-            
+            card_data = await self.card_renderer.render_digest(
+                f"{len(achievements)} more achievements",
+                [(achievement.get('rarity_tier', 'Bronze'), avatar) for achievement, avatar in zip(achievements, avatars)]
+            )
         except Exception as e:
-            logger.error(f"Failed to generate achievement card: {e}")
+            logger.error(f"Failed to render digest card: {e}")
             return None
+        logger.info(f"Generated digest card for {len(achievements)} achievements ({len(card_data)} bytes)")
+        return card_data
+    
+    def rate_limit_capacity(self) -> Dict[str, float]:
+        """Posts each platform can make right now"""
+        return {platform: self.rate_limiter.remaining(key) for platform, key in self._rate_limit_keys.items()}
     
-    async def post_to_bluesky(self, message: str, achievement: Dict, share_url: Optional[str] = None) -> bool:
-        """Post message to Bluesky with optional link card"""
+    def rate_limit_wait(self) -> float:
+        """Seconds until every platform has room for another post"""
+        return max((self.rate_limiter.wait_time(key) for key in self._rate_limit_keys.values()), default=0.0)
+    
+    async def _bluesky_call(self, method, *args, **kwargs):
+        """Await a Bluesky API call, bounded by BLUESKY_MAX_CONCURRENCY"""
+        async with self._bluesky_semaphore:
+            try:
+                return await method(*args, **kwargs)
+            except RequestErrorBase as e:
+                status = str(e.response.status_code) if e.response is not None else type(e).__name__
+                self.metrics.inc('feedmaster_http_errors_total', host=self._bluesky_host, status=status)
+                raise
+    
+    async def _card_blob(self, card_data: bytes):
+        """Blob ref for a card, reusing an earlier upload of identical bytes. Returns (blob, reused)"""
+        account = self._bluesky_did
+        digest = hashlib.sha256(card_data).hexdigest()
+        row = self.outbox.get_blob_ref(account, digest, self.blob_reuse_window_hours * 3600)
+        if row is not None:
+            logger.info(f"Reusing uploaded achievement card blob {row['cid']}")
+            return models.blob_ref.BlobRef(mime_type=row['mime_type'], size=row['size'],
+                                           ref=models.blob_ref.IpldLink(link=row['cid'])), True
+        
+        # Upload achievement card image to Bluesky
+        upload_result = await self._bluesky_call(self.bluesky_client.upload_blob, card_data)
+        image_blob = upload_result.blob if hasattr(upload_result, 'blob') else upload_result
         try:
-            # Check rate limiting
-            now = datetime.now()
-            if now >= self.hour_reset_time:
-                self.posts_this_hour = 0
-                self.hour_reset_time = now + timedelta(hours=1)
-            
-            if self.posts_this_hour >= self.max_posts_per_hour:
-                logger.warning(f"Rate limit reached ({self.max_posts_per_hour} posts/hour). Skipping post.")
-                return False
-            
-            # Create post with achievement card embed
-            embed = None
-            
-            # Generate achievement card image
-            card_path = await self.generate_achievement_card(achievement)
-            if card_path and os.path.exists(card_path):
-                try:
-                    # Upload achievement card image to Bluesky
-                    with open(card_path, 'rb') as f:
-                        card_data = f.read()
-                    
-                    upload_result = self.bluesky_client.upload_blob(card_data)
-                    image_blob = upload_result.blob if hasattr(upload_result, 'blob') else upload_result
-                    
-                    # Create external embed with achievement card
-                    if share_url and share_url.startswith(('http://', 'https://')):
-                        # URL encode the share_url to handle spaces and special characters
-                        from urllib.parse import quote
-                        encoded_url = quote(share_url, safe=':/?#[]@!$&\'()*+,;=')
-                        
-                        external = models.AppBskyEmbedExternal.External(
-                            uri=encoded_url,
-                            title=f"{achievement.get('achievement_name', 'Achievement Unlocked')}",
-                            description=f"{achievement.get('user_display_name') or achievement.get('user_handle', 'User')} earned this {achievement.get('rarity_tier', 'Bronze')} achievement!",
-                            thumb=image_blob
-                        )
-                        embed = models.AppBskyEmbedExternal.Main(external=external)
-                        logger.info(f"Created achievement card link card with URL: {encoded_url}")
-                    else:
-                        # If no valid share URL, just post the image
-                        embed = models.AppBskyEmbedImages.Main(
-                            images=[models.AppBskyEmbedImages.Image(
-                                alt="Achievement card",
-                                image=image_blob
-                            )]
-                        )
-                        logger.info(f"Created achievement card image embed (no valid URL: {share_url})")
-                        
-                except Exception as e:
-                    logger.error(f"Failed to upload achievement card: {e}")
-                    embed = None
-            else:
-                logger.warning(f"Failed to generate achievement card, falling back to text-only post")
+            self.outbox.save_blob_ref(account, digest, str(image_blob.cid), image_blob.mime_type, image_blob.size)
+        except sqlite3.Error as e:
+            # The upload itself worked, only later reuse of it is lost
+            logger.warning(f"Failed to remember uploaded card blob {image_blob.cid}: {e}")
+        return image_blob, False
+    
+    def _card_embed(self, achievement: Dict, image_blob, share_url: Optional[str]):
+        """Link card (or image embed without a share URL) showing the achievement card"""
+        # Create external embed with achievement card
+        if share_url and share_url.startswith(('http://', 'https://')):
+            # URL encode the share_url to handle spaces and special characters
+            encoded_url = quote(share_url, safe=':/?#[]@!$&\'()*+,;=')
             
+            external = models.AppBskyEmbedExternal.External(
+                uri=encoded_url,
+                title=f"{achievement.get('achievement_name', 'Achievement Unlocked')}",
+                description=f"{achievement.get('user_display_name') or achievement.get('user_handle', 'User')} earned this {achievement.get('rarity_tier', 'Bronze')} achievement!",
+                thumb=image_blob
+            )
+            logger.info(f"Created achievement card link card with URL: {encoded_url}")
+            return models.AppBskyEmbedExternal.Main(external=external)
+        # If no valid share URL, just post the image
+        logger.info(f"Created achievement card image embed (no valid URL: {share_url})")
+        return models.AppBskyEmbedImages.Main(
+            images=[models.AppBskyEmbedImages.Image(
+                alt=achievement.get('_alt_text') or "Achievement card",
+                image=image_blob
+            )]
+        )
+    
+    async def _bluesky_post_exists(self, rkey: str) -> bool:
+        """Whether the bot's account has a post under this record key"""
+        try:
+            # Not through _bluesky_call, a missing record is the expected answer rather than an error
+            async with self._bluesky_semaphore:
+                await self.bluesky_client.app.bsky.feed.post.get(self._bluesky_did, rkey)
+            return True
+        except BadRequestError:
+            # RecordNotFound
+            return False
+    
+    async def _create_bluesky_post(self, job: DeliveryJob, embed=None):
+        """Create the job's post under its deterministic record key, a post already there counts as created"""
+        rkey = achievement_rkey(job.achievement)
+        record = models.AppBskyFeedPost.Record(
+            created_at=self.bluesky_client.get_current_time_iso(),
+            text=job.message,
+            embed=embed,
+            langs=['en']
+        )
+        try:
+            await self._bluesky_call(self.bluesky_client.app.bsky.feed.post.create, self._bluesky_did, record, rkey=rkey)
+        except Exception:
+            # A timeout or conflict may hide an earlier attempt that did write the record
+            if await self._bluesky_post_exists(rkey):
+                logger.info(f"Post {rkey} already exists, not posting it again")
+                return
+            raise
+    
+    async def _publish_bluesky(self, job: DeliveryJob) -> bool:
+        """Send the post for a rendered and uploaded job"""
+        try:
             # Post to Bluesky with or without embed
-            if embed:
-                self.bluesky_client.send_post(text=message, embed=embed)
+            if job.embed:
+                try:
+                    await self._create_bluesky_post(job, job.embed)
+                except BadRequestError as e:
+                    if not job.reused_blob:
+                        raise
+                    # The PDS no longer has the earlier upload, forget it and upload the card again
+                    logger.warning(f"Reused card blob was rejected ({e}), uploading it again")
+                    self.outbox.forget_blob_ref(self._bluesky_did, hashlib.sha256(job.card_data).hexdigest())
+                    image_blob, _ = await self._card_blob(job.card_data)
+                    await self._create_bluesky_post(job, self._card_embed(job.achievement, image_blob, job.share_url))
                 logger.info(f"Posted with link card")
             else:
-                self.bluesky_client.send_post(text=message)
+                await self._create_bluesky_post(job)
                 logger.info(f"Posted text-only (no link card available)")
             
-            self.posts_this_hour += 1
-            
-            logger.info(f"Successfully posted ({self.posts_this_hour}/{self.max_posts_per_hour} this hour)")
+            logger.info(f"Successfully posted ({self.rate_limiter.remaining(self._rate_limit_keys.get('bluesky', 'bluesky')):.1f} posts left in the budget)")
             return True
             
         except Exception as e:
             logger.error(f"Failed to post to Bluesky: {e}")
             return False
     
-    async def process_achievements(self):
-        """Process and post recent achievements"""
-        achievements = await self.get_recent_achievements()
+    def _cursor_updates(self, achievements: List[Dict], streamed: bool) -> Dict[str, int]:
+        """Cursor values to save once a fetched batch is recorded"""
+        if self.fetch_mode == 'per_feed' and not streamed:
+            updates = {f"feed:{feed_id}": cursor for feed_id, cursor in self._pending_feed_cursors.items()}
+            self._pending_feed_cursors = {}
+            return updates
+        if not achievements:
+            return {}
+        
+        latest_id = max(achievement.get('id', 0) for achievement in achievements)
+        updates = {'global': latest_id}
+        if self.fetch_mode == 'per_feed':
+            # The stream is ordered across all feeds, so every feed is caught up to latest_id
+            updates.update({f"feed:{feed_id}": latest_id for feed_id in self.feed_ids})
+        return updates
+    
+    async def process_achievements(self, achievements: Optional[List[Dict]] = None):
+        """Record recent achievements in the outbox and deliver pending ones, fetching unless a streamed batch is given"""
+        streamed = achievements is not None
+        if not streamed:
+            achievements = await self.get_recent_achievements()
+        
+        # Evaluate routing rules over the whole batch, then drop achievements already posted
+        platforms = self.platforms
+        targets = {}
+        duplicates = []
+        matched = set()
+        for achievement, rule in self.rules.evaluate(achievements):
+            matched.add(id(achievement))
+            if self._is_duplicate(achievement):
+                duplicates.append(achievement)
+                continue
+            targets[achievement.get('id')] = [platform for platform in platforms if rule.platforms is None or platform in rule.platforms]
+        self._count_achievements('fetched', achievements)
+        self._count_achievements('eligible', [achievement for achievement in achievements if achievement.get('id') in targets])
+        self._count_achievements('duplicate', duplicates)
+        self._count_achievements('filtered', [achievement for achievement in achievements if id(achievement) not in matched])
+        if duplicates:
+            logger.info(f"Skipped {len(duplicates)} already-posted achievements")
+        missing_rarity = sum(1 for achievement in achievements if not achievement.get('rarity_tier'))
+        if missing_rarity:
+            logger.warning(f"Skipping {missing_rarity} achievements - rarity not calculated yet")
         
-        # Filter achievements that meet posting criteria
-        eligible_achievements = []
+        # Record the batch and advance cursors together, so nothing fetched is lost
+        cursor_updates = self._cursor_updates(achievements, streamed)
+        self.outbox.record_batch(achievements, targets, platforms, cursor_updates)
+        for name, value in cursor_updates.items():
+            if name == 'global':
+                self.last_processed_id = max(value, self.last_processed_id or 0)
+            else:
+                feed_id = name[len('feed:'):]
+                self.feed_cursors[feed_id] = max(value, self.feed_cursors.get(feed_id, 0))
+        logger.info(f"Recorded {len(achievements)} achievements ({len(targets)} eligible)")
+        
+        self._load_queue()
+        now = time.time()
+        evicted = []
         for achievement in achievements:
-            if self.should_post_achievement(achievement):
-                eligible_achievements.append(achievement)
+            if targets.get(achievement.get('id')):
+                evicted.extend(self.queue.push(achievement['id'], achievement.get('rarity_percentage'), now))
+        if evicted:
+            self._skip(evicted, 'evicted from queue', 'evicted')
+            logger.warning(f"Queue full, dropped {len(evicted)} least rare achievements")
         
-        # Sort by rarity (rarest first) - lower percentage = rarer
-        eligible_achievements.sort(key=lambda x: x.get('rarity_percentage', 100))
+        await self.deliver_pending()
+        
+        if self.fetch_mode == 'per_feed':
+            logger.info(f"Processed up to feed cursors: {self.feed_cursors}")
+        else:
+            logger.info(f"Processed up to achievement ID: {self.last_processed_id}")
+    
+    async def deliver_pending(self):
+        """Drain the rarest pending achievements from the outbox (at-least-once delivery)"""
+        platforms = self.platforms
+        if not platforms:
+            return
         
-        # Limit to max posts per interval
-        achievements_to_post = eligible_achievements[:self.max_posts_per_interval]
+        # Best of everything pending, limited to max posts per interval - the rest carry over
+        self._load_queue()
+        selected_ids, expired_ids = self.queue.pop_best(self.max_posts_per_interval)
+        if expired_ids:
+            self._skip(expired_ids, 'expired', 'expired')
+            logger.info(f"Expired {len(expired_ids)} achievements older than {self.queue_max_age_hours:g} hours")
+        achievements_to_post = self.outbox.load_pending(selected_ids, platforms)
         
-        posted_count = 0
-        for achievement in achievements_to_post:
-            message, share_url = self.format_message(achievement)
-            
-            logger.info(f"Posting achievement: {achievement['user_handle']} - {achievement['achievement_name']} ({achievement.get('rarity_percentage', 0):.2f}% rarity)")
-            
-            # Post to both platforms
-            bluesky_success = False
-            discord_success = False
+        self._claimed_awards = set()
+        self._claimed_users = set()
+        self._posted_count = 0
+        self._deferred_count = 0
+        self._digested_count = 0
+        # Digests take their post budget before the individual posts, which would otherwise use it all
+        digests = asyncio.create_task(self._deliver_digests(*self._prepare_digests()))
+        await self.pipeline.run(
+            DeliveryJob(achievement, fetched_at, pending_platforms)
+            for achievement, fetched_at, pending_platforms in achievements_to_post
+        )
+        await digests
+        if self._publishing:
+            await asyncio.gather(*self._publishing)
+        
+        self.seen_index.flush()
+        self.outbox.save_rate_limits(self.rate_limiter.snapshot())
+        if self._deferred_count:
+            logger.warning(f"Rate limit reached, deferred {self._deferred_count} achievements by {self.rate_limit_wait():.0f}s "
+                           f"(capacity {self.rate_limit_capacity()})")
+        logger.info(f"Posted {self._posted_count}/{len(achievements_to_post)} pending achievements (limited by max_posts_per_interval={self.max_posts_per_interval})")
+        if self._digested_count:
+            logger.info(f"Summarized {self._digested_count} more achievements in a digest")
+        logger.info(f"Outbox: {self.outbox.counts()}, {len(self.queue)} queued for later intervals")
+        self._log_pipeline_stats()
+    
+    def _carry_over(self, job: DeliveryJob):
+        achievement = job.achievement
+        self.queue.push(achievement['id'], achievement.get('rarity_percentage'), job.fetched_at)
+    
+    def _requeue_job(self, job: DeliveryJob, stage_name: str):
+        """A stage failed unexpectedly, try the job again in a later interval"""
+        for key in job.acquired:
+            self.rate_limiter.release(key)
+        job.acquired = []
+        self._carry_over(job)
+    
+    async def _filter_stage(self, job: DeliveryJob) -> Optional[DeliveryJob]:
+        """Rate limit, duplicate and cooldown checks just before an achievement is rendered"""
+        achievement = job.achievement
+        achievement_id = achievement['id']
+        id_key, award_key = self._seen_keys(achievement)
+        if id_key not in self.seen_index and (award_key in self.seen_index or award_key in self._claimed_awards):
+            # Same award already posted under another ID (a partially posted ID is retried normally)
+            logger.info(f"Skipping duplicate achievement {achievement_id}: {award_key}")
+            self._skip([achievement_id], 'duplicate', 'duplicate')
+            return None
+        rule = self.rules.rule_for(achievement)
+        user_key = (rule.name, achievement.get('user_handle'))
+        if id_key not in self.seen_index and (self.rules.in_cooldown(achievement) or user_key in self._claimed_users):
+            logger.info(f"Skipping achievement {achievement_id}: {achievement.get('user_handle')} is in cooldown")
+            self._skip([achievement_id], 'cooldown', 'cooldown')
+            return None
+        
+        # Claim the award and user so later jobs in this run see them as taken
+        self._claimed_awards.add(award_key)
+        if rule.cooldown_seconds:
+            self._claimed_users.add(user_key)
+        
+        # Take a post from each platform's budget, platforms without one wait for a later run
+        allowed = []
+        for platform in job.platforms:
+            key = self._rate_limit_keys.get(platform, platform)
+            if self.rate_limiter.acquire(key):
+                job.acquired.append(key)
+                allowed.append(platform)
+        if not allowed:
+            self._claimed_awards.discard(award_key)
+            self._claimed_users.discard(user_key)
+            self._deferred_count += 1
+            self._carry_over(job)
+            return None
+        job.deferred = len(allowed) < len(job.platforms)
+        job.platforms = allowed
+        job.message, job.share_url = self.format_message(achievement)
+        return job
+    
+    async def _render_stage(self, job: DeliveryJob) -> Optional[DeliveryJob]:
+        """Generate the achievement card image for sinks that post it"""
+        if not await self._skip_published(job):
+            return None
+        if any(self.sinks[platform].needs_card for platform in job.platforms):
+            job.card_data = await self.generate_achievement_card(job.achievement)
+            if not job.card_data:
+                logger.warning(f"Failed to generate achievement card, falling back to text-only post")
+        return job
+    
+    async def _skip_published(self, job: DeliveryJob) -> bool:
+        """Mark sinks an earlier attempt already published to, returning whether any sink is left to post"""
+        achievement = job.achievement
+        # Only a delivery tried before can already be out there, first attempts skip the lookup
+        attempted = self.outbox.attempted_platforms(achievement['id'])
+        candidates = [platform for platform in job.platforms if platform in attempted]
+        if not candidates:
+            return True
+        checks = await asyncio.gather(*(self.sinks[platform].is_published(job) for platform in candidates))
+        published = [platform for platform, done in zip(candidates, checks) if done]
+        if not published:
+            return True
+        
+        logger.info(f"Achievement {achievement['id']} is already on {', '.join(published)}, skipping it there")
+        for platform in published:
+            self.outbox.mark(achievement['id'], platform, True)
+            key = self._rate_limit_keys.get(platform, platform)
+            if key in job.acquired:
+                job.acquired.remove(key)
+                self.rate_limiter.release(key)
+        self._remember_posted(achievement)
+        job.platforms = [platform for platform in job.platforms if platform not in published]
+        if job.platforms:
+            return True
+        if job.deferred and self.outbox.load_pending([achievement['id']], self.platforms):
+            self._carry_over(job)
+        return False
+    
+    async def _upload_stage(self, job: DeliveryJob) -> DeliveryJob:
+        """Let every sink upload what it needs before the job is queued"""
+        await asyncio.gather(*(self.sinks[platform].prepare(job) for platform in job.platforms))
+        return job
+    
+    async def _prepare_bluesky(self, job: DeliveryJob):
+        """Upload the card and build the post embed, falling back to the share page's own link card"""
+        if job.card_data:
+            try:
+                job.image_blob, job.reused_blob = await self._card_blob(job.card_data)
+                job.embed = self._card_embed(job.achievement, job.image_blob, job.share_url)
+            except Exception as e:
+                logger.error(f"Failed to upload achievement card: {e}")
+                job.embed = None
+        if job.embed is None and job.digest is None and job.share_url and job.share_url.startswith(('http://', 'https://')):
+            job.embed = await self._share_page_embed(job.share_url)
+    
+    async def _share_page_embed(self, url: str):
+        """Link card built from the share page's title, description and og:image, or None if it can't be read"""
+        metadata = await self.fetch_url_metadata(url)
+        if not metadata:
+            return None
+        logger.info(f"Created link card from share page metadata for {url}")
+        return models.AppBskyEmbedExternal.Main(external=models.AppBskyEmbedExternal.External(
+            uri=metadata['url'],
+            title=metadata['title'] or url,
+            description=metadata['description'],
+            thumb=metadata['image_blob']
+        ))
+    
+    async def _publish_stage(self, job: DeliveryJob):
+        """Fan the achievement out to every sink still pending for it"""
+        achievement = job.achievement
+        logger.info(f"Posting achievement: {achievement['user_handle']} - {achievement['achievement_name']} ({achievement.get('rarity_percentage', 0):.2f}% rarity)")
+        self.outbox.mark_started(achievement['id'], job.platforms)
+        
+        futures = {}
+        for platform in job.platforms:
+            future = self.sinks[platform].submit(job)
+            if future is None:
+                # The sink is backed up, leave it pending for a later run
+                logger.warning(f"Sink {platform} queue is full, deferring achievement {achievement['id']}")
+                key = self._rate_limit_keys.get(platform, platform)
+                if key in job.acquired:
+                    job.acquired.remove(key)
+                    self.rate_limiter.release(key)
+                job.deferred = True
+                continue
+            futures[platform] = future
+        
+        # Sinks complete in the background, so the next achievement is fanned out right away
+        task = asyncio.create_task(self._finish_job(job, futures))
+        self._publishing.add(task)
+        task.add_done_callback(self._publishing.discard)
+    
+    async def _finish_job(self, job: DeliveryJob, futures: Dict[str, asyncio.Future]):
+        """Record each sink's outcome as it lands, then the achievement's once every sink has been tried"""
+        achievement = job.achievement
+        
+        async def outcome(platform: str, future: asyncio.Future) -> bool:
+            success = await future
+            self.outbox.mark(achievement['id'], platform, success, None if success else 'post failed')
+            return success
+        results = await asyncio.gather(*(outcome(platform, future) for platform, future in futures.items()))
+        
+        # Retry failed and rate limited platforms in a later run unless attempts ran out
+        if (job.deferred or not all(results)) and self.outbox.load_pending([achievement['id']], self.platforms):
+            self._carry_over(job)
+        
+        # Consider it successful if at least one platform worked
+        if any(results):
+            self._remember_posted(achievement)
+            self.rules.note_posted(achievement)
+            self._posted_count += 1
+            self._count_achievements('posted', [achievement])
+    
+    def _prepare_digests(self) -> tuple:
+        """Pull the overflow out of the queue into digest jobs, returning (jobs, achievements taken)
+        
+        Achievements routed to different sets of sinks go in separate digests, one per distinct set.
+        """
+        if not self.digest_mode or len(self.queue) < self.digest_threshold:
+            return [], []
+        selected_ids, expired_ids = self.queue.pop_best(self.digest_max_items)
+        if expired_ids:
+            self._skip(expired_ids, 'expired', 'expired')
+        taken = []
+        duplicates = []
+        for achievement, fetched_at, pending_platforms in self.outbox.load_pending(selected_ids, self.platforms):
+            if self._is_duplicate(achievement):
+                duplicates.append(achievement['id'])
+            else:
+                taken.append((achievement, fetched_at, pending_platforms))
+        if duplicates:
+            self._skip(duplicates, 'duplicate', 'duplicate')
+        
+        groups: Dict[tuple, List[str]] = {}
+        for platform in self.platforms:
+            ids = tuple(achievement['id'] for achievement, _, pending_platforms in taken if platform in pending_platforms)
+            if ids:
+                groups.setdefault(ids, []).append(platform)
+        
+        by_id = {achievement['id']: achievement for achievement, _, _ in taken}
+        jobs = []
+        for ids, platforms in groups.items():
+            achievements = [by_id[achievement_id] for achievement_id in ids]
+            if len(achievements) < 2:
+                continue
+            job = DeliveryJob(self._digest_achievement(achievements), time.time(), [])
+            for platform in platforms:
+                key = self._rate_limit_keys.get(platform, platform)
+                if self.rate_limiter.acquire(key):
+                    job.acquired.append(key)
+                    job.platforms.append(platform)
+            if job.platforms:
+                job.digest = achievements
+                job.message = self._digest_message(achievements)
+                jobs.append(job)
+        return jobs, taken
+    
+    def _digest_achievement(self, achievements: List[Dict]) -> Dict:
+        """Stand-in achievement describing a digest, for sinks that read achievement fields"""
+        rarest = min(achievements, key=lambda achievement: achievement.get('rarity_percentage') or 100)
+        ids = ','.join(str(achievement['id']) for achievement in achievements)
+        return {
+            'id': f"digest-{hashlib.sha256(ids.encode()).hexdigest()[:16]}",
+            'digest': True,
+            'achievement_name': f"{len(achievements)} more achievements",
+            'rarity_tier': rarest.get('rarity_tier', 'Bronze'),
+            'rarity_percentage': rarest.get('rarity_percentage', 0),
+            'user_handle': rarest.get('user_handle', 'unknown'),
+            'achievements': achievements,
+            '_alt_text': "Avatars of the users who earned: " + ', '.join(
+                f"{achievement.get('user_display_name') or achievement.get('user_handle', 'unknown')} "
+                f"({achievement.get('achievement_name', 'Unknown Achievement')}, {achievement.get('rarity_tier', 'Bronze')})"
+                for achievement in achievements
+            )
+        }
+    
+    def _digest_message(self, achievements: List[Dict], max_length: int = 300) -> str:
+        """Digest post text listing the rarest achievements that fit within Bluesky's post length"""
+        message = f"🏆 {len(achievements)} more achievements earned recently:"
+        for listed, achievement in enumerate(achievements):
+            name = achievement.get('user_display_name') or achievement.get('user_handle', 'unknown')
+            line = f"\n• {name}: {achievement.get('achievement_name', 'Unknown Achievement')} ({achievement.get('rarity_tier', 'Bronze')})"
+            more = f"\n…and {len(achievements) - listed - 1} more" if listed < len(achievements) - 1 else ''
+            if len(message) + len(line) + len(more) > max_length:
+                return message + f"\n…and {len(achievements) - listed} more"
+            message += line
+        return message
+    
+    async def _deliver_digests(self, jobs: List[DeliveryJob], taken: List[tuple]):
+        """Post each digest to its sinks, then queue whatever is still pending for a later run"""
+        for job in jobs:
+            ids = [achievement['id'] for achievement in job.digest]
+            try:
+                job.card_data = await self.render_digest_card(job.digest)
+                await self._upload_stage(job)
+            except Exception as e:
+                logger.error(f"Failed to prepare digest: {e}")
+                for key in job.acquired:
+                    self.rate_limiter.release(key)
+                continue
             
-            if self.bluesky_client:
-                bluesky_success = await self.post_to_bluesky(message, achievement, share_url)
+            futures = {}
+            for platform in job.platforms:
+                future = self.sinks[platform].submit(job)
+                if future is None:
+                    key = self._rate_limit_keys.get(platform, platform)
+                    if key in job.acquired:
+                        job.acquired.remove(key)
+                        self.rate_limiter.release(key)
+                    continue
+                futures[platform] = future
+            results = await asyncio.gather(*futures.values())
             
-            if self.discord_webhook_url:
-                discord_success = await self.post_to_discord(message, achievement)
-                
-            # Consider it successful if at least one platform worked
-            if bluesky_success or discord_success:
-                posted_count += 1
-                # Small delay between posts
-                await asyncio.sleep(2)
-            elif self.bluesky_client and not bluesky_success:
-                # If we hit Bluesky rate limit, stop processing
-                break
-        
-        # Update cursor to latest achievement ID (even if not posted)
-        if achievements:
-            latest_id = max(achievement.get('id', 0) for achievement in achievements)
-            if latest_id > self.last_processed_id:
-                self.last_processed_id = latest_id
-                self._save_cursor(latest_id)
+            for platform, success in zip(futures, results):
+                if success:
+                    self.outbox.mark_digested(ids, platform)
+            if any(results):
+                for achievement in job.digest:
+                    self._remember_posted(achievement)
+                    self.rules.note_posted(achievement)
+                self._digested_count += len(ids)
+                self._count_achievements('digested', job.digest)
         
-        logger.info(f"Posted {posted_count}/{len(achievements_to_post)} eligible achievements (limited by max_posts_per_interval={self.max_posts_per_interval})")
-        logger.info(f"Processed up to achievement ID: {self.last_processed_id}")
+        for achievement, fetched_at, _ in taken:
+            if self.outbox.load_pending([achievement['id']], self.platforms):
+                self.queue.push(achievement['id'], achievement.get('rarity_percentage'), fetched_at)
+    
+    def _log_pipeline_stats(self):
+        for stage in self.pipeline.stages:
+            stats = stage.stats()
+            logger.info(f"Pipeline {stage.name}: {stats['processed']} processed, {stats['failed']} failed, "
+                        f"avg {stats['avg_ms']:.0f} ms, max {stats['max_ms']:.0f} ms, "
+                        f"max queue depth {stats['max_depth']}/{stage.queue_size}")
+        for name, sink in self.sinks.items():
+            stats = sink.stats()
+            logger.info(f"Sink {name}: {stats['published']} published, {stats['failed']} failed, {stats['retries']} retries, "
+                        f"{stats['backlogged']} deferred by a full queue, {stats['queued']} queued")
+    
+    def _load_queue(self):
+        """Rebuild the carry-over queue from pending outbox rows once platforms are known"""
+        if self._queue_loaded or not self.platforms:
+            return
+        evicted = []
+        for achievement_id, rarity_percentage, fetched_at in self.outbox.pending_entries(self.platforms):
+            evicted.extend(self.queue.push(achievement_id, rarity_percentage, fetched_at))
+        if evicted:
+            self._skip(evicted, 'evicted from queue', 'evicted')
+        self._queue_loaded = True
+        logger.info(f"Loaded {len(self.queue)} pending achievements into the carry-over queue")
     
     async def run(self):
         """Main bot loop"""
@@ -651,30 +3646,103 @@ class FeedmasterBlueskyBot:
         # Authenticate with Bluesky (if configured)
         if self.bluesky_username or self.bluesky_did:
             await self.authenticate_bluesky()
+            if self.bluesky_client:
+                self._session_task = asyncio.create_task(self._keep_bluesky_session())
         
         # Log enabled platforms
-        platforms = []
-        if self.bluesky_client:
-            platforms.append("Bluesky")
-        if self.discord_webhook_url:
-            platforms.append("Discord")
-        logger.info(f"Enabled platforms: {', '.join(platforms)}")
+        logger.info(f"Enabled platforms: {', '.join(self.platforms)}")
         
-        while True:
+        if self.metrics_port:
+            self._metrics_server = MetricsServer(self.metrics, self.metrics_host, self.metrics_port)
             try:
-                await self.process_achievements()
-                
-                # Wait for next poll
-                logger.info(f"Sleeping for {self.poll_interval_minutes} minutes...")
-                await asyncio.sleep(self.poll_interval_minutes * 60)
-                
-            except KeyboardInterrupt:
-                logger.info("Bot stopped by user")
-                break
-            except Exception as e:
-                logger.error(f"Unexpected error: {e}")
-                # Wait a bit before retrying
-                await asyncio.sleep(60)
+                await self._metrics_server.start()
+            except OSError as e:
+                logger.error(f"Failed to start metrics endpoint on port {self.metrics_port}: {e}")
+                self._metrics_server = None
+        
+        try:
+            while True:
+                try:
+                    if self.ingest_mode == 'stream' and time.monotonic() >= self._stream_retry_at:
+                        await self.run_stream()
+                        self._stream_retry_at = time.monotonic() + self.stream_retry_minutes * 60
+                    
+                    await self.process_achievements()
+                    if time.monotonic() >= self._next_purge_at:
+                        self.outbox.purge(self.outbox_retention_days)
+                        self._next_purge_at = time.monotonic() + 3600
+                    if not self._fetch_failed:
+                        self.scheduler.record_poll(self._last_fetch_count, self._backlog_pending)
+                    self._log_http_stats()
+                    
+                    # Wait for next poll
+                    delay = self.scheduler.next_delay()
+                    logger.info(f"Sleeping for {delay / 60:.1f} minutes...")
+                    await self._idle(delay)
+                    
+                except KeyboardInterrupt:
+                    logger.info("Bot stopped by user")
+                    break
+                except Exception as e:
+                    logger.error(f"Unexpected error: {e}")
+                    # Back off before retrying
+                    self.scheduler.record_error()
+                    await asyncio.sleep(self.scheduler.next_delay())
+        finally:
+            await self.shutdown()
+    
+    async def _idle(self, delay: float):
+        """Sleep until the next poll, delivering rate limited achievements as soon as the budget allows"""
+        deadline = time.monotonic() + delay
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            wake = remaining
+            if self._deferred_count:
+                wake = min(wake, max(1.0, self.rate_limit_wait()))
+            await asyncio.sleep(wake)
+            if self._deferred_count and time.monotonic() < deadline:
+                await self.deliver_pending()
+    
+    def _log_http_stats(self):
+        """Log connection reuse for each pooled host and card/avatar cache effectiveness"""
+        for host, stats in self.http.stats().items():
+            logger.info(f"HTTP pool {host}: {stats['requests']} requests, {stats['connections']} connections opened, "
+                        f"reuse {stats['reuse_ratio']:.0%}")
+        stats = self.card_cache.stats()
+        logger.info(f"Card cache: {stats['hits_memory']} memory hits, {stats['hits_disk']} disk hits, {stats['misses']} misses "
+                    f"({stats['hit_ratio']:.0%}), {stats['evictions']} evictions, {stats['disk_entries']} cards / "
+                    f"{stats['disk_bytes'] / 1048576:.1f} MB on disk")
+        for name, sink in self.sinks.items():
+            if isinstance(sink, DiscordSink):
+                stats = sink.publisher.stats()
+                logger.info(f"Discord {name}: {stats['embeds']} achievements in {stats['messages']} messages, "
+                            f"{stats['rate_limited']} rate limited, bucket {stats['bucket']} ({stats['remaining']} remaining)")
+        stats = self.avatar_cache.stats()
+        logger.info(f"Avatar cache: {stats['hits']} hits, {stats['revalidated']} revalidated, "
+                    f"{stats['downloads']} downloads, {stats['entries']} cached")
+        stats = self.link_metadata_cache.stats()
+        if stats['hits'] or stats['misses']:
+            logger.info(f"Link metadata cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} cached")
+    
+    async def shutdown(self):
+        """Release long-lived resources"""
+        if self._session_task:
+            self._session_task.cancel()
+        if self._metrics_server:
+            await self._metrics_server.close()
+        self._log_http_stats()
+        for sink in self.sinks.values():
+            await sink.close()
+        await self.http.aclose()
+        if self.bluesky_client:
+            await self.bluesky_client.request.close()
+        logger.info("HTTP connection pool closed")
+        self.outbox.save_rate_limits(self.rate_limiter.snapshot())
+        self.outbox.close()
+        self.seen_index.close()
+        self.card_renderer.shutdown()
 
 async def main():
     bot = FeedmasterBlueskyBot()
@@ -7,8 +7,10 @@ Access via http://localhost:8080
 """
 
 import os
+import re
 import subprocess
 import json
+import urllib.request
 from flask import Flask, render_template_string, request, redirect, flash, jsonify
 from dotenv import load_dotenv, set_key
 import logging
@@ -42,6 +44,7 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 ENV_FILE = '.env'
+METRICS_URL = os.getenv('METRICS_URL', 'http://bluesky-bot:9108/metrics')
 
 def load_config():
     """Load current configuration from .env file"""
@@ -66,6 +69,73 @@ def save_config(config):
     for key, value in config.items():
         set_key(ENV_FILE, key, value)
 
+SAMPLE_PATTERN = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)$')
+LABEL_PATTERN = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+def parse_metrics(text):
+    """Parse Prometheus text format into (name, labels, value) samples"""
+    samples = []
+    for line in text.splitlines():
+        match = SAMPLE_PATTERN.match(line.strip())
+        if not match:
+            continue
+        name, labels, value = match.groups()
+        labels = {key: re.sub(r'\\(.)', lambda m: '\n' if m.group(1) == 'n' else m.group(1), raw)
+                  for key, raw in LABEL_PATTERN.findall(labels or '')}
+        samples.append((name, labels, float(value)))
+    return samples
+
+def histogram_quantile(quantile, buckets):
+    """Estimate a quantile from cumulative (upper bound, count) buckets, like PromQL's histogram_quantile"""
+    buckets = sorted(buckets)
+    total = buckets[-1][1] if buckets else 0
+    if not total:
+        return None
+    rank = quantile * total
+    lower, below = 0.0, 0
+    for upper, count in buckets:
+        if count >= rank:
+            if upper == float('inf'):
+                return lower
+            return lower + (upper - lower) * (rank - below) / (count - below) if count > below else upper
+        lower, below = upper, count
+    return lower
+
+def summarize_metrics(samples):
+    """Condense raw samples into the numbers shown on the status page"""
+    summary = {'latency': {}, 'feeds': {}, 'rate_limits': {}, 'caches': {}, 'http_errors': [], 'outbox': {}, 'queue_depth': 0}
+    histograms = {}
+    for name, labels, value in samples:
+        if name.endswith('_bucket') and 'le' in labels:
+            series = {'feedmaster_fetch_seconds_bucket': 'fetch',
+                      'feedmaster_stage_seconds_bucket': labels.get('stage'),
+                      'feedmaster_post_seconds_bucket': f"post to {labels.get('sink')}"}.get(name)
+            if series:
+                histograms.setdefault(series, []).append((float(labels['le']), value))
+        elif name == 'feedmaster_achievements_total':
+            summary['feeds'].setdefault(labels.get('feed'), {})[labels.get('outcome')] = int(value)
+        elif name == 'feedmaster_rate_limit_tokens':
+            summary['rate_limits'].setdefault(labels.get('sink'), {})['tokens'] = value
+        elif name == 'feedmaster_rate_limit_wait_seconds':
+            # A budget that never refills has no finite wait, which JSON can't carry
+            summary['rate_limits'].setdefault(labels.get('sink'), {})['wait_seconds'] = value if value != float('inf') else None
+        elif name == 'feedmaster_cache_hit_ratio':
+            summary['caches'][labels.get('cache')] = value
+        elif name == 'feedmaster_http_errors_total':
+            summary['http_errors'].append({'host': labels.get('host'), 'status': labels.get('status'), 'count': int(value)})
+        elif name == 'feedmaster_outbox_deliveries':
+            summary['outbox'][labels.get('state')] = int(value)
+        elif name == 'feedmaster_queue_depth':
+            summary['queue_depth'] = int(value)
+    for series, buckets in histograms.items():
+        p50, p99 = histogram_quantile(0.5, buckets), histogram_quantile(0.99, buckets)
+        summary['latency'][series] = {
+            'count': int(max(count for _, count in buckets)),
+            'p50_ms': p50 * 1000 if p50 is not None else None,
+            'p99_ms': p99 * 1000 if p99 is not None else None,
+        }
+    return summary
+
 
 
 CONFIG_TEMPLATE = """
@@ -88,6 +158,8 @@ CONFIG_TEMPLATE = """
         .alert { padding: 10px; margin: 10px 0; border-radius: 4px; }
         .alert-success { background: #d4edda; color: #155724; }
         .alert-error { background: #f8d7da; color: #721c24; }
+        .metrics-table { width: 100%; border-collapse: collapse; margin-bottom: 15px; font-size: 0.9em; }
+        .metrics-table th, .metrics-table td { text-align: left; padding: 4px 8px; border-bottom: 1px solid #ddd; }
     </style>
 </head>
 <body>
@@ -101,6 +173,14 @@ CONFIG_TEMPLATE = """
         <button type="button" id="refreshStatusBtn" onclick="checkBotStatus()" style="margin-top: 10px; display: none;">🔄 Refresh Status</button>
     </div>
 
+    <div class="section" style="margin-bottom: 20px;">
+        <h2>📈 Bot Metrics</h2>
+        <div id="botMetrics" style="padding: 10px; border-radius: 4px; background: #f8f9fa;">
+            <span style="color: #6c757d;">Loading metrics...</span>
+        </div>
+        <button type="button" onclick="loadMetrics()" style="margin-top: 10px;">🔄 Refresh Metrics</button>
+    </div>
+
     {% with messages = get_flashed_messages() %}
         {% if messages %}
             {% for message in messages %}
@@ -342,10 +422,64 @@ CONFIG_TEMPLATE = """
                 });
         }
         
-        // Update behavior preview and check bot status on page load
+        function escapeHtml(value) {
+            return String(value).replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;')
+                .replace(/"/g, '&quot;').replace(/'/g, '&#39;');
+        }
+        
+        function metricsTable(headers, rows) {
+            if (!rows.length) {
+                return '<p style="color: #6c757d;">None yet</p>';
+            }
+            // Label values come from the bot, the Feedmaster API and the rules file, so escape every cell
+            const head = '<tr>' + headers.map(h => '<th>' + escapeHtml(h) + '</th>').join('') + '</tr>';
+            const body = rows.map(row => '<tr>' + row.map(cell => '<td>' + escapeHtml(cell) + '</td>').join('') + '</tr>').join('');
+            return '<table class="metrics-table">' + head + body + '</table>';
+        }
+        
+        function formatMs(value) {
+            return value === null ? '-' : value.toFixed(0) + ' ms';
+        }
+        
+        function loadMetrics() {
+            fetch('/metrics')
+                .then(response => response.json())
+                .then(data => {
+                    const metricsDiv = document.getElementById('botMetrics');
+                    if (data.status !== 'ok') {
+                        metricsDiv.innerHTML = '<span style="color: #ffc107; font-weight: bold;">⚠️ Metrics Unavailable</span><br><small>' + escapeHtml(data.details) + '</small>';
+                        return;
+                    }
+                    const m = data.metrics;
+                    const outcomes = ['fetched', 'eligible', 'posted', 'digested'];
+                    const feeds = Object.entries(m.feeds).map(([feed, counts]) => {
+                        const dropped = Object.entries(counts).filter(([outcome]) => !outcomes.includes(outcome)).reduce((sum, [, n]) => sum + n, 0);
+                        return [feed].concat(outcomes.map(outcome => counts[outcome] || 0), [dropped]);
+                    });
+                    const latency = Object.entries(m.latency).map(([name, l]) => [name, l.count, formatMs(l.p50_ms), formatMs(l.p99_ms)]);
+                    const limits = Object.entries(m.rate_limits).map(([sink, l]) => [sink, l.tokens.toFixed(1), l.wait_seconds === null ? 'never' : l.wait_seconds.toFixed(0) + ' s']);
+                    const caches = Object.entries(m.caches).map(([cache, ratio]) => [cache, (ratio * 100).toFixed(0) + '%']);
+                    const errors = m.http_errors.map(e => [e.host, e.status, e.count]);
+                    const outbox = Object.entries(m.outbox).map(([state, n]) => state + ': ' + n).join(', ');
+                    metricsDiv.innerHTML =
+                        '<h3>Achievements per feed</h3>' + metricsTable(['Feed', 'Fetched', 'Eligible', 'Posted', 'Digested', 'Dropped'], feeds) +
+                        '<h3>Latency</h3>' + metricsTable(['Step', 'Count', 'p50', 'p99'], latency) +
+                        '<h3>Rate limit headroom</h3>' + metricsTable(['Sink', 'Posts left', 'Next post in'], limits) +
+                        '<h3>Cache hit ratio</h3>' + metricsTable(['Cache', 'Hits'], caches) +
+                        '<h3>HTTP errors</h3>' + metricsTable(['Host', 'Status', 'Count'], errors) +
+                        '<small>Queue: ' + escapeHtml(m.queue_depth) + ' waiting. Outbox: ' + escapeHtml(outbox || 'empty') + '</small>';
+                })
+                .catch(error => {
+                    document.getElementById('botMetrics').innerHTML = '<span style="color: #dc3545;">Error loading metrics: ' + escapeHtml(error) + '</span>';
+                });
+        }
+        
+        // Update behavior preview, check bot status and load metrics on page load
         document.addEventListener('DOMContentLoaded', function() {
             updateBotBehavior();
             checkBotStatus();
+            loadMetrics();
+            setInterval(loadMetrics, 30000);
         });
     </script>
 </body>
@@ -450,5 +584,15 @@ def status():
     except Exception as e:
         return jsonify({'status': 'error', 'details': str(e)})
 
+@app.route('/metrics')
+@requires_auth
+def metrics():
+    try:
+        with urllib.request.urlopen(METRICS_URL, timeout=5) as response:
+            samples = parse_metrics(response.read().decode('utf-8'))
+        return jsonify({'status': 'ok', 'metrics': summarize_metrics(samples)})
+    except Exception as e:
+        return jsonify({'status': 'error', 'details': f'Could not read {METRICS_URL}: {e}'})
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8080, debug=False)
\ No newline at end of file
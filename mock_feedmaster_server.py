@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Mock Feedmaster Server
+
+Stand-in for the Feedmaster API so the bot can be run and tested offline.
+Generates synthetic achievements and serves them from the polling endpoint
+and as a Server-Sent Events stream.
+
+Usage:
+    python mock_feedmaster_server.py
+    FEEDMASTER_API_URL=http://localhost:8090 INGEST_MODE=stream python bot.py
+"""
+
+import os
+import json
+import random
+import threading
+import time
+from io import BytesIO
+from flask import Flask, Response, request, jsonify
+from PIL import Image, ImageDraw
+
+app = Flask(__name__)
+
+PORT = int(os.getenv('MOCK_PORT', '8090'))
+RATE_PER_MINUTE = float(os.getenv('MOCK_RATE_PER_MINUTE', '30'))
+FEED_IDS = os.getenv('MOCK_FEED_IDS', '3654,5555').split(',')
+HEARTBEAT_SECONDS = 15
+
+RARITY_TIERS = [
+    ('Bronze', 60.0), ('Silver', 30.0), ('Gold', 12.0), ('Platinum', 5.0),
+    ('Diamond', 1.5), ('Legendary', 0.4), ('Mythic', 0.05)
+]
+ACHIEVEMENT_NAMES = ['Power Poster II', 'Night Owl', 'Conversation Starter', 'Trendsetter', 'Early Bird', 'Viral Hit']
+
+achievements = []
+condition = threading.Condition()
+
+# Discord webhook stand-in: a bucket of 5 requests per 2 seconds, like Discord's webhook limit
+WEBHOOK_LIMIT = 5
+WEBHOOK_WINDOW_SECONDS = 2.0
+webhook_lock = threading.Lock()
+webhook_window = {'reset_at': 0.0, 'remaining': WEBHOOK_LIMIT}
+webhook_messages = []
+
+# Generic webhook, Slack and Mastodon stand-ins for extra publisher sinks
+SINK_DELAY_SECONDS = float(os.getenv('MOCK_SINK_DELAY_SECONDS', '0'))
+sink_lock = threading.Lock()
+sink_posts = {}
+mastodon_statuses = {}
+
+
+def base_url() -> str:
+    return os.getenv('MOCK_PUBLIC_URL', f'http://localhost:{PORT}')
+
+
+def make_achievement(achievement_id: int) -> dict:
+    """Build one synthetic achievement in the Feedmaster response shape"""
+    tier, max_percentage = random.choice(RARITY_TIERS)
+    user_number = random.randint(1, 200)
+    return {
+        'id': achievement_id,
+        'feed_id': random.choice(FEED_IDS),
+        'user_handle': f'user{user_number}.bsky.social',
+        'user_display_name': f'User {user_number}',
+        'user_avatar_url': f'{base_url()}/avatars/{user_number}.jpg',
+        'achievement_name': random.choice(ACHIEVEMENT_NAMES),
+        'rarity_tier': tier,
+        'rarity_percentage': round(random.uniform(max_percentage / 10, max_percentage), 2),
+        'share_url': f'{base_url()}/share/{achievement_id}'
+    }
+
+
+def generate_achievements():
+    """Append synthetic achievements at the configured rate"""
+    while True:
+        time.sleep(random.expovariate(RATE_PER_MINUTE / 60))
+        with condition:
+            achievements.append(make_achievement(len(achievements) + 1))
+            condition.notify_all()
+
+
+def matching(feed_ids: set, since_id: int) -> list:
+    return [a for a in achievements[since_id:] if not feed_ids or a['feed_id'] in feed_ids]
+
+
+def parse_feed_ids() -> set:
+    return {feed_id for feed_id in request.args.get('feed_ids', '').split(',') if feed_id}
+
+
+@app.route('/api/v1/achievements/recent')
+def recent():
+    since_id = int(request.args.get('since_id', 0))
+    limit = int(request.args.get('limit', 50))
+    with condition:
+        page = matching(parse_feed_ids(), since_id)[:limit]
+    return jsonify({'achievements': page})
+
+
+@app.route('/api/v1/achievements/stream')
+def stream():
+    feed_ids = parse_feed_ids()
+    since_id = int(request.headers.get('Last-Event-ID') or request.args.get('since_id', 0))
+
+    def events():
+        cursor = since_id
+        while True:
+            with condition:
+                condition.wait_for(lambda: len(achievements) > cursor, timeout=HEARTBEAT_SECONDS)
+                new = matching(feed_ids, cursor)
+                cursor = len(achievements)
+            if not new:
+                yield ': heartbeat\n\n'
+            for achievement in new:
+                yield f"id: {achievement['id']}\nevent: achievement\ndata: {json.dumps(achievement)}\n\n"
+
+    return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+
+@app.route('/avatars/<int:user_number>.jpg')
+def avatar(user_number):
+    """Full-size JPEG avatar, like the Bluesky CDN, with ETag revalidation"""
+    random.seed(user_number)
+    img = Image.new('RGB', (1000, 1000), tuple(random.randint(40, 220) for _ in range(3)))
+    ImageDraw.Draw(img).ellipse([250, 250, 750, 750], fill=(255, 255, 255))
+    random.seed()
+    buffer = BytesIO()
+    img.save(buffer, 'JPEG', quality=90)
+    response = Response(buffer.getvalue(), mimetype='image/jpeg')
+    response.set_etag(f'avatar-{user_number}')
+    return response.make_conditional(request)
+
+
+@app.route('/discord/webhook', methods=['POST'])
+def discord_webhook():
+    """Accept webhook messages with Discord's rate-limit headers and 429 responses"""
+    with webhook_lock:
+        now = time.monotonic()
+        if now >= webhook_window['reset_at']:
+            webhook_window.update(reset_at=now + WEBHOOK_WINDOW_SECONDS, remaining=WEBHOOK_LIMIT)
+        reset_after = round(webhook_window['reset_at'] - now, 3)
+        headers = {'X-RateLimit-Bucket': 'mock-webhook', 'X-RateLimit-Limit': str(WEBHOOK_LIMIT), 'X-RateLimit-Reset-After': str(reset_after)}
+        if webhook_window['remaining'] == 0:
+            headers['X-RateLimit-Remaining'] = '0'
+            return jsonify({'message': 'You are being rate limited.', 'retry_after': reset_after, 'global': False}), 429, headers
+        webhook_window['remaining'] -= 1
+        headers['X-RateLimit-Remaining'] = str(webhook_window['remaining'])
+        embeds = (request.get_json(silent=True) or {}).get('embeds', [])
+        if not 1 <= len(embeds) <= 10:
+            return jsonify({'message': 'Invalid Form Body'}), 400, headers
+        webhook_messages.append(len(embeds))
+    return '', 204, headers
+
+
+@app.route('/webhook/<name>', methods=['POST'])
+def generic_webhook(name):
+    """Record JSON posts for a webhook or Slack sink, slowed by MOCK_SINK_DELAY_SECONDS"""
+    time.sleep(SINK_DELAY_SECONDS)
+    with sink_lock:
+        sink_posts.setdefault(name, []).append(request.get_json(silent=True))
+    return 'ok'
+
+
+@app.route('/api/v2/media', methods=['POST'])
+def mastodon_media():
+    if 'file' not in request.files:
+        return jsonify({'error': 'file is required'}), 422
+    return jsonify({'id': str(random.randint(1, 10 ** 9)), 'type': 'image'})
+
+
+@app.route('/api/v1/statuses', methods=['POST'])
+def mastodon_status():
+    """Create a status, returning the original one for a repeated Idempotency-Key like Mastodon"""
+    if not request.headers.get('Authorization', '').startswith('Bearer '):
+        return jsonify({'error': 'The access token is invalid'}), 401
+    key = request.headers.get('Idempotency-Key') or str(random.random())
+    with sink_lock:
+        status = mastodon_statuses.setdefault(key, {'id': str(len(mastodon_statuses) + 1), **(request.get_json(silent=True) or {})})
+    return jsonify(status)
+
+
+@app.route('/share/<int:achievement_id>')
+def share(achievement_id):
+    with condition:
+        achievement = achievements[achievement_id - 1] if 0 < achievement_id <= len(achievements) else None
+    if achievement is None:
+        return 'Not found', 404
+    return f"""<!DOCTYPE html>
+<html><head>
+<title>{achievement['achievement_name']}</title>
+<meta property="og:title" content="{achievement['achievement_name']}">
+<meta property="og:description" content="{achievement['user_display_name']} earned a {achievement['rarity_tier']} achievement">
+<meta property="og:image" content="{achievement['user_avatar_url']}">
+</head><body><h1>{achievement['achievement_name']}</h1></body></html>"""
+
+
+if __name__ == '__main__':
+    threading.Thread(target=generate_achievements, daemon=True).start()
+    app.run(host='0.0.0.0', port=PORT, debug=False, threaded=True)